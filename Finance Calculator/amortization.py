@@ -0,0 +1,158 @@
+# Amortization schedules for the bond calculator.
+# finance_calculators.py only works out the monthly repayment of a home loan.
+# This module also works out, month by month, how much of each repayment is
+# interest, how much pays off the loan (principal) and how much is still
+# owed (balance), using the same P, i and n as the bond calculator:
+#   P = present value of the house, i = interest rate / 1200, n = months
+#   repayment = (i * P) / (1 - (1 + i) ** -n)
+#
+# - schedule() is a generator: it works out one month at a time, so even a
+#   30-year loan never needs the whole schedule in memory.
+# - balance_at(), interest_paid_by() and total_interest() use formulas that
+#   give the answer straight away, without going through the months.
+# - Run as a program, it reads a CSV of loans and writes every schedule (or
+#   a one-line summary of each loan) to a CSV, one row at a time.
+#
+# Amounts are kept unrounded while calculating and rounded to 2 decimal
+# places when written out.
+#
+# Usage: python amortization.py LOANS.csv OUTPUT.csv [--summary]
+# LOANS.csv has the columns present_value, interest_rate and months, and
+# optionally loan_id.
+
+import argparse
+import csv
+import sys
+import math
+from finance_batch import BOND_COLUMNS
+from finance_calculators import NEAR_ZERO_RATE, near_zero_repayment
+
+SCHEDULE_COLUMNS = ["loan_id", "month", "payment", "interest", "principal", "balance"]
+SUMMARY_COLUMNS = ["loan_id", "present_value", "interest_rate", "months", "repayment",
+                   "total_paid", "total_interest"]
+
+
+# -------------------- FORMULAS
+def monthly_rate(interest_rate):
+    '''
+    Monthly interest rate (i) for a yearly interest rate given as a number,
+    e.g. 7 for 7%
+    '''
+    return interest_rate/1200
+
+def monthly_repayment(P, interest_rate, n):
+    '''
+    Monthly repayment, before rounding, using the bond calculator's formula.
+    With a 0% interest rate the loan is simply split into n equal payments.
+    '''
+    i = monthly_rate(interest_rate)
+    if abs(interest_rate) < NEAR_ZERO_RATE:
+        return near_zero_repayment(P, i, n)
+    return (i * P)/(1-((1+i)**(-n)))
+
+def balance_at(P, interest_rate, n, k):
+    '''
+    Amount still owed after k monthly repayments (0 <= k <= n), worked out
+    directly rather than month by month
+    '''
+    if k >= n:
+        return 0.0
+    i = monthly_rate(interest_rate)
+    repayment = monthly_repayment(P, interest_rate, n)
+    if i == 0:
+        return P - repayment * k
+    # (1+i)**k - 1, without losing digits when i is small
+    growth_less_one = math.expm1(k * math.log1p(i))
+    return P * (growth_less_one + 1) - repayment * growth_less_one / i
+
+def interest_paid_by(P, interest_rate, n, k):
+    '''
+    Total interest paid in the first k monthly repayments
+    '''
+    k = min(k, n)
+    return monthly_repayment(P, interest_rate, n) * k - (P - balance_at(P, interest_rate, n, k))
+
+def total_interest(P, interest_rate, n):
+    '''
+    Total interest paid over the whole loan
+    '''
+    return monthly_repayment(P, interest_rate, n) * n - P
+
+
+# -------------------- SCHEDULES
+def schedule(P, interest_rate, n):
+    '''
+    Yields (month, payment, interest, principal, balance) for each month of
+    the loan, one month at a time.
+    The last payment pays off exactly what is left, so the final balance is
+    0 despite any rounding error building up along the way.
+    '''
+    i = monthly_rate(interest_rate)
+    repayment = monthly_repayment(P, interest_rate, n)
+    balance = P
+    for month in range(1, n + 1):
+        interest = balance * i
+        if month == n:
+            principal = balance
+        else:
+            principal = repayment - interest
+        balance -= principal
+        yield month, interest + principal, interest, principal, balance
+
+def read_loans(in_file):
+    '''
+    Yields (loan id, P, interest rate, n) for each loan in an
+    open CSV file. Loans without a loan_id are numbered from 1.
+    '''
+    reader = csv.DictReader(in_file)
+    if not all(column in (reader.fieldnames or []) for column in BOND_COLUMNS):
+        raise ValueError(f"the file must have the columns {', '.join(BOND_COLUMNS)}")
+    for loan_number, row in enumerate(reader, 1):
+        try:
+            P = float(row["present_value"])
+            interest_rate = float(row["interest_rate"])
+            n = int(row["months"])
+            if n < 1:
+                raise ValueError("months must be at least 1")
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"Line {reader.line_num}: {error}")
+        yield row.get("loan_id") or loan_number, P, interest_rate, n
+
+def write_schedules(input_path, output_path, summary = False):
+    '''
+    Write the schedule of every loan in 'input_path' to 'output_path', or
+    with 'summary' a single row per loan. Returns the number of loans.
+    '''
+    num_loans = 0
+    with open(input_path, "r", newline="") as in_file, \
+         open(output_path, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(SUMMARY_COLUMNS if summary else SCHEDULE_COLUMNS)
+        for loan_id, P, interest_rate, n in read_loans(in_file):
+            if summary:
+                repayment = monthly_repayment(P, interest_rate, n)
+                writer.writerow([loan_id, P, interest_rate, n, round(repayment, 2),
+                                 round(repayment * n, 2), round(total_interest(P, interest_rate, n), 2)])
+            else:
+                writer.writerows([loan_id, month] + [round(amount, 2) for amount in amounts]
+                                 for month, *amounts in schedule(P, interest_rate, n))
+            num_loans += 1
+    return num_loans
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Write month-by-month schedules for home loans.")
+    parser.add_argument("input", help="CSV file with present_value, interest_rate, months (and loan_id)")
+    parser.add_argument("output", help="CSV file to write the schedules to")
+    parser.add_argument("--summary", action="store_true",
+                        help="write one row per loan with its repayment and total interest")
+    args = parser.parse_args(argv)
+    try:
+        num_loans = write_schedules(args.input, args.output, args.summary)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 1
+    print(f"{'Summaries' if args.summary else 'Schedules'} for {num_loans} loans written to {args.output}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,209 @@
+# Benchmark and accuracy suite for the finance calculators.
+#
+# Speed: for each size, made-up scenarios are worked out
+# - one at a time with finance_calculators.py ('scalar'),
+# - all at once with the NumPy formulas in finance_batch.py ('batched'),
+# - all at once and then rounded like the calculator ('batched + rounding').
+#
+# Accuracy: for each calculator and each kind of input (typical, small rates,
+# near-zero rates, long terms, large amounts) the float results are compared
+# with the exact answer worked out with the decimal module to 50 digits. For
+# bonds, the original formula (i * P)/(1-((1+i)**(-n))) is checked as well as
+# the one now used, which switches to near_zero_repayments() for rates below
+# NEAR_ZERO_RATE. For each, the largest relative error is shown along with
+# how many results round to a different number of pence than the exact
+# answer does.
+#
+# Results are printed and can be saved as JSON with --output.
+#
+# Usage: python bench_finance.py [--sizes 1000,100000,1000000] [--samples N]
+#                                [--seed S] [--output FILE]
+
+import argparse
+import json
+import platform
+import sys
+import time
+from decimal import Decimal, localcontext
+from finance_batch import np, simple_totals, compound_totals, bond_repayments, round_results
+from finance_calculators import simple_interest, compound_interest, bond_repayment, NEAR_ZERO_RATE
+
+DEFAULT_SIZES = "1000,100000,1000000"
+
+# Digits used for the exact answers.
+REFERENCE_PRECISION = 50
+
+# Ranges used for each kind of input: (amounts, yearly interest rates in %,
+# years, months). Rates are spread evenly on a log scale.
+INPUT_KINDS = {
+    "typical":        ((1e3, 1e6), (0.5, 20), (1, 40), (12, 480)),
+    "small rates":    ((1e3, 1e6), (1e-4, 1e-1), (1, 40), (12, 480)),
+    "near-zero rates": ((1e3, 1e6), (1e-12, 1e-4), (1, 40), (12, 480)),
+    "long terms":     ((1e3, 1e6), (0.5, 20), (100, 1000), (1200, 12000)),
+    "large amounts":  ((1e9, 1e12), (0.5, 20), (1, 40), (12, 480)),
+}
+
+
+def make_inputs(kind, num_scenarios, rng):
+    '''
+    Random amounts, rates, years and months for one kind of input
+    '''
+    amounts, rates, years, months = INPUT_KINDS[kind]
+    return {
+        "amount": rng.uniform(*amounts, num_scenarios),
+        "rate": np.exp(rng.uniform(np.log(rates[0]), np.log(rates[1]), num_scenarios)),
+        "years": rng.integers(years[0], years[1] + 1, num_scenarios).astype(np.float64),
+        "months": rng.integers(months[0], months[1] + 1, num_scenarios).astype(np.float64),
+    }
+
+
+# -------------------- SPEED
+def time_call(function, *arguments):
+    start = time.perf_counter()
+    function(*arguments)
+    return time.perf_counter() - start
+
+def run_speed(size, rng):
+    '''
+    Time every calculator on 'size' typical scenarios. Returns a list of
+    result dictionaries.
+    '''
+    data = make_inputs("typical", size, rng)
+    amounts, rates = data["amount"], data["rate"]
+    years, months = data["years"], data["months"]
+    # The scalar functions are given plain Python numbers, as a program
+    # calling them one quote at a time would.
+    scalar_inputs = {"simple": (simple_interest, amounts.tolist(), rates.tolist(), years.astype(int).tolist()),
+                     "compound": (compound_interest, amounts.tolist(), rates.tolist(), years.astype(int).tolist()),
+                     "bond": (bond_repayment, amounts.tolist(), rates.tolist(), months.astype(int).tolist())}
+    batched_inputs = {"simple": (simple_totals, amounts, rates, years),
+                      "compound": (compound_totals, amounts, rates, years),
+                      "bond": (bond_repayments, amounts, rates, months)}
+
+    results = []
+    for calculator in ("simple", "compound", "bond"):
+        scalar_function, *scalar_arguments = scalar_inputs[calculator]
+        batched_function, *batched_arguments = batched_inputs[calculator]
+        timings = {
+            "scalar": time_call(lambda: [scalar_function(*values) for values in zip(*scalar_arguments)]),
+            "batched": time_call(batched_function, *batched_arguments),
+            "batched + rounding": time_call(lambda: round_results(batched_function(*batched_arguments))),
+        }
+        for method, seconds in timings.items():
+            results.append({"calculator": calculator, "size": size, "method": method,
+                            "seconds": seconds, "per_second": size / max(seconds, 1e-9)})
+    return results
+
+
+# -------------------- ACCURACY
+def original_bond_repayments(present_value, interest_rate, months):
+    '''
+    The bond formula exactly as the calculator first had it
+    '''
+    i = interest_rate/1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (i * present_value)/(1-((1+i)**(-months)))
+
+def exact_result(calculator, amount, rate, term):
+    '''
+    The answer worked out with the decimal module from the exact values of
+    the (float) inputs
+    '''
+    with localcontext() as context:
+        context.prec = REFERENCE_PRECISION
+        amount, rate = Decimal(amount), Decimal(rate)
+        term = int(term)
+        if calculator == "simple":
+            return amount * (1 + term * rate / 100)
+        if calculator == "compound":
+            return amount * (1 + rate / 100) ** term
+        i = rate / 1200
+        if i == 0:
+            return amount / term
+        return i * amount / (1 - (1 + i) ** -term)
+
+def compare(results, exact):
+    '''
+    Returns (largest relative error, number of results rounded to different
+    pence) for an array of float results and a list of exact Decimal answers
+    '''
+    largest_error = 0.0
+    wrong_pence = 0
+    penny = Decimal("0.01")
+    for result, answer in zip(results.tolist(), exact):
+        if answer != 0:
+            largest_error = max(largest_error, abs(float((Decimal(result) - answer) / answer)))
+        # round() on a float rounds its exact value, halves to even, as
+        # quantize() does here. quantize() needs enough digits for the whole
+        # number of pence.
+        with localcontext() as context:
+            context.prec = max(REFERENCE_PRECISION, answer.adjusted() + 3)
+            if Decimal(repr(round(result, 2))) != answer.quantize(penny):
+                wrong_pence += 1
+    return largest_error, wrong_pence
+
+def run_accuracy(num_samples, rng):
+    '''
+    Check every calculator on every kind of input. Returns a list of result
+    dictionaries.
+    '''
+    results = []
+    for kind in INPUT_KINDS:
+        data = make_inputs(kind, num_samples, rng)
+        formulas = [("simple", "current", simple_totals, "years"),
+                    ("compound", "current", compound_totals, "years"),
+                    ("bond", "original", original_bond_repayments, "months"),
+                    ("bond", "current", bond_repayments, "months")]
+        exact = {}
+        for calculator, formula, function, term in formulas:
+            if calculator not in exact:
+                exact[calculator] = [exact_result(calculator, *values) for values in
+                                     zip(data["amount"].tolist(), data["rate"].tolist(), data[term].tolist())]
+            largest_error, wrong_pence = compare(function(data["amount"], data["rate"], data[term]),
+                                                 exact[calculator])
+            results.append({"calculator": calculator, "formula": formula, "inputs": kind,
+                            "largest_error": largest_error, "wrong_pence": wrong_pence,
+                            "samples": num_samples})
+    return results
+
+
+# -------------------- RUNNING THE SUITE
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Time the finance calculators and check their accuracy.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"comma-separated numbers of scenarios to time (default {DEFAULT_SIZES})")
+    parser.add_argument("--samples", type=int, default=2000,
+                        help="scenarios checked for accuracy for each kind of input (default 2000)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="save the results as JSON to this file")
+    args = parser.parse_args(argv)
+    if np is None:
+        print("ERROR: the benchmark needs NumPy. Install it with 'pip install numpy'.")
+        return 1
+    rng = np.random.default_rng(args.seed)
+
+    print(f"{'Calculator':<11}{'Scenarios':>11}  {'Method':<20}{'Time':>10}{'Per second':>15}")
+    speed = []
+    for size in (int(size) for size in args.sizes.split(",")):
+        for result in run_speed(size, rng):
+            speed.append(result)
+            print(f"{result['calculator']:<11}{size:>11,}  {result['method']:<20}"
+                  f"{result['seconds']:>9.4f}s{result['per_second']:>15,.0f}")
+
+    print(f"\nAccuracy against {REFERENCE_PRECISION}-digit decimal answers "
+          f"({args.samples} scenarios each, near-zero bond rates below {NEAR_ZERO_RATE}%):")
+    print(f"{'Calculator':<11}{'Formula':<10}{'Inputs':<17}{'Largest error':>14}{'Wrong pence':>13}")
+    accuracy = run_accuracy(args.samples, rng)
+    for result in accuracy:
+        print(f"{result['calculator']:<11}{result['formula']:<10}{result['inputs']:<17}"
+              f"{result['largest_error']:>14.2e}{result['wrong_pence']:>13}")
+
+    if args.output:
+        with open(args.output, "w") as out_file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                       "speed": speed, "accuracy": accuracy}, out_file, indent=2)
+        print(f"\nResults saved to {args.output}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# Benchmark for the inverse solvers in solvers.py.
+# Makes random scenarios, works out their repayments and totals with the
+# calculators' own formulas, then times how long each solver takes to get
+# back to the inputs. Prints the number of scenarios solved per second and
+# the largest difference from the original inputs.
+#
+# Usage: python bench_solvers.py [--scenarios N] [--seed S]
+
+import argparse
+import sys
+import time
+from finance_batch import np, bond_repayments, compound_totals
+import solvers
+
+# The solvers should manage at least this many scenarios per second.
+TARGET_RATE = 100_000
+
+
+def make_scenarios(num_scenarios, seed):
+    '''
+    Random loans and investments, with their repayments and totals
+    '''
+    rng = np.random.default_rng(seed)
+    amounts = rng.uniform(1_000, 1_000_000, num_scenarios)
+    rates = rng.uniform(0.01, 20, num_scenarios)
+    months = rng.integers(1, 481, num_scenarios).astype(np.float64)
+    years = rng.integers(1, 51, num_scenarios).astype(np.float64)
+    return {
+        "amount": amounts, "rate": rates, "months": months, "years": years,
+        "repayment": bond_repayments(amounts, rates, months),
+        "total": compound_totals(amounts, rates, years),
+    }
+
+def run_benchmark(num_scenarios, seed):
+    '''
+    Time every solver. Returns a list of (name, seconds, largest error).
+    '''
+    data = make_scenarios(num_scenarios, seed)
+    # (name, solver, inputs, expected answer, whether the error is relative)
+    cases = [
+        ("bond rate", solvers.bond_rate, ("repayment", "amount", "months"), "rate", False),
+        ("bond principal", solvers.bond_principal, ("repayment", "rate", "months"), "amount", True),
+        ("bond term", solvers.bond_term, ("repayment", "amount", "rate"), "months", False),
+        ("compound rate", solvers.compound_rate, ("total", "amount", "years"), "rate", False),
+        ("compound deposit", solvers.compound_deposit, ("total", "rate", "years"), "amount", True),
+        ("compound years", solvers.compound_years, ("total", "amount", "rate"), "years", False),
+    ]
+    results = []
+    for name, solver, inputs, expected, relative in cases:
+        start = time.perf_counter()
+        answers = solver(*[data[column] for column in inputs])
+        seconds = time.perf_counter() - start
+        errors = np.abs(answers - data[expected])
+        if relative:
+            errors = errors / data[expected]
+        results.append((name, seconds, float(np.max(errors))))
+    return results
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Time the inverse solvers.")
+    parser.add_argument("--scenarios", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+    if np is None:
+        print("ERROR: the solvers need NumPy. Install it with 'pip install numpy'.")
+        return 1
+
+    print(f"{'Solver':<18}{'Time':>10}{'Solves/s':>14}{'Largest error':>16}")
+    too_slow = []
+    for name, seconds, error in run_benchmark(args.scenarios, args.seed):
+        solves_per_second = args.scenarios / max(seconds, 1e-9)
+        print(f"{name:<18}{seconds:>9.3f}s{solves_per_second:>14,.0f}{error:>16.2e}")
+        if solves_per_second < TARGET_RATE:
+            too_slow.append(name)
+    if too_slow:
+        print(f"Slower than {TARGET_RATE:,} solves/s: {', '.join(too_slow)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+# Batch mode for the finance calculators.
+# Instead of asking for one scenario at a time, this program reads a whole
+# file of scenarios and works out every result at once using NumPy arrays.
+#
+# The input file is either a CSV file or a NumPy .npz file (one array per
+# column) with the columns:
+# - investment: deposit, interest_rate, years, interest_type
+#               (interest_type is 'simple' or 'compound')
+# - bond:       present_value, interest_rate, months
+# The calculator is chosen from the columns in the file.
+#
+# The file is read, calculated and written a block of rows at a time, so
+# files of any size can be priced without holding them in memory. The
+# results file is a CSV with the input columns followed by total_amount
+# (investment) or repayment (bond), rounded to 2 decimal places in exactly
+# the same way as finance_calculators.py. A 0% interest rate is split into
+# equal monthly payments.
+#
+# Usage: python finance_batch.py INPUT.csv|INPUT.npz OUTPUT.csv
+
+import csv
+import sys
+from itertools import islice
+
+# NumPy is only needed for batch mode, so the interactive calculator still
+# works without it.
+try:
+    import numpy as np
+except ImportError:
+    np = None
+from finance_calculators import NEAR_ZERO_RATE
+
+INVESTMENT_COLUMNS = ["deposit", "interest_rate", "years", "interest_type"]
+BOND_COLUMNS = ["present_value", "interest_rate", "months"]
+
+# Number of rows read, calculated and written together.
+CHUNK_SIZE = 65536
+
+
+# -------------------- CALCULATIONS
+# These use the same formulas, in the same order, as finance_calculators.py
+# so that the results are identical.
+def investment_totals(deposit, interest_rate, years, compound):
+    '''
+    Total amount of each investment after interest, before rounding.
+
+    Inputs:
+    deposit, interest_rate, years: arrays with one value per scenario
+    compound: Boolean array - True for compound interest, False for simple
+    '''
+    return np.where(compound, compound_totals(deposit, interest_rate, years),
+                    simple_totals(deposit, interest_rate, years))
+
+def simple_totals(deposit, interest_rate, years):
+    '''
+    Total amount after simple interest, before rounding. Works on single
+    numbers or arrays of any shape that can be broadcast together.
+    '''
+    return deposit * (1 + (years * (interest_rate/100)))
+
+def compound_totals(deposit, interest_rate, years):
+    '''
+    Total amount after compound interest, before rounding. Works on single
+    numbers or arrays of any shape that can be broadcast together.
+    '''
+    return deposit * ((1 + (interest_rate/100)) ** years)
+
+def bond_repayments(present_value, interest_rate, months):
+    '''
+    Monthly repayment of each bond, before rounding. Rates closer to 0 than
+    NEAR_ZERO_RATE are worked out with near_zero_repayments() instead.
+
+    Inputs:
+    present_value, interest_rate, months: arrays with one value per scenario
+    (or any shapes that can be broadcast together)
+    '''
+    i = interest_rate/1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        repayments = (i * present_value)/(1-((1+i)**(-months)))
+    near_zero = np.abs(interest_rate) < NEAR_ZERO_RATE
+    # Most files have no tiny rates, so the second formula is usually skipped.
+    if np.any(near_zero):
+        repayments = np.where(near_zero, near_zero_repayments(present_value, i, months), repayments)
+    return repayments
+
+def near_zero_repayments(P, i, n):
+    '''
+    Array version of finance_calculators.near_zero_repayment()
+    '''
+    with np.errstate(divide="ignore", invalid="ignore"):
+        repayments = (i * P)/-np.expm1(-n * np.log1p(i))
+    return np.where(i == 0, P/n, repayments)
+
+def round_results(results):
+    '''
+    Round to 2 decimal places with Python's round(), as the interactive
+    calculator does. np.round() scales by 100 first, which can round a
+    handful of values differently in the last digit.
+    '''
+    return [round(result, 2) for result in results.tolist()]
+
+
+# -------------------- READING FILES
+def check_columns(columns):
+    '''
+    Work out which calculator a file is for from its columns
+    '''
+    if all(column in columns for column in INVESTMENT_COLUMNS):
+        return "investment"
+    if all(column in columns for column in BOND_COLUMNS):
+        return "bond"
+    raise ValueError("the file must have the columns "
+                     f"{', '.join(INVESTMENT_COLUMNS)} (investment) or "
+                     f"{', '.join(BOND_COLUMNS)} (bond)")
+
+def read_csv_chunks(in_file):
+    '''
+    Yields (calculator, first line number, rows) for each block of rows in an
+    open CSV file. Each row is a dictionary of column name to text.
+    '''
+    reader = csv.DictReader(in_file)
+    calculator = check_columns(reader.fieldnames or [])
+    line_number = 2
+    while True:
+        rows = list(islice(reader, CHUNK_SIZE))
+        if not rows:
+            return
+        yield calculator, line_number, rows
+        line_number += len(rows)
+
+def read_npz_chunks(path):
+    '''
+    Yields (calculator, first row number, rows) for each block of rows in a
+    .npz file. Each row is a dictionary of column name to value.
+    '''
+    with np.load(path) as arrays:
+        calculator = check_columns(arrays.files)
+        columns = INVESTMENT_COLUMNS if calculator == "investment" else BOND_COLUMNS
+        data = {column: arrays[column] for column in columns}
+    num_rows = len(data[columns[0]])
+    for start in range(0, num_rows, CHUNK_SIZE):
+        rows = [dict(zip(columns, values))
+                for values in zip(*[data[column][start:start + CHUNK_SIZE].tolist() for column in columns])]
+        yield calculator, start + 1, rows
+
+def to_arrays(calculator, first_line, rows):
+    '''
+    Convert a block of rows into NumPy arrays, checking every value.
+    Raises ValueError giving the line of the first invalid row.
+    '''
+    columns = INVESTMENT_COLUMNS if calculator == "investment" else BOND_COLUMNS
+    try:
+        arrays = {}
+        for column in columns:
+            if column == "interest_type":
+                interest_types = np.char.lower(np.char.strip(np.array([str(row[column]) for row in rows])))
+                arrays["compound"] = interest_types == "compound"
+                if not np.all(arrays["compound"] | (interest_types == "simple")):
+                    raise ValueError
+            # Years and months are whole numbers, as in the calculator.
+            elif column in ("years", "months"):
+                arrays[column] = np.array([row[column] for row in rows], dtype=np.int64).astype(np.float64)
+            else:
+                arrays[column] = np.array([row[column] for row in rows], dtype=np.float64)
+        if calculator == "bond" and np.any(arrays["months"] < 1):
+            raise ValueError
+        return arrays
+    except (TypeError, ValueError):
+        # Look through the rows one at a time to report the first bad one.
+        for line_number, row in enumerate(rows, first_line):
+            check_row(calculator, row, line_number)
+        raise
+
+def check_row(calculator, row, line_number):
+    '''
+    Raises ValueError describing what is wrong with a row, if anything
+    '''
+    try:
+        columns = INVESTMENT_COLUMNS if calculator == "investment" else BOND_COLUMNS
+        for column in columns:
+            if column in ("years", "months"):
+                int(row[column])
+            elif column != "interest_type":
+                float(row[column])
+        if calculator == "investment":
+            if str(row["interest_type"]).strip().lower() not in ("simple", "compound"):
+                raise ValueError(f"interest_type must be 'simple' or 'compound', not '{row['interest_type']}'")
+        elif int(row["months"]) < 1:
+            raise ValueError("months must be at least 1")
+    except (TypeError, ValueError) as error:
+        raise ValueError(f"Line {line_number}: {error}")
+
+
+# -------------------- RUNNING A BATCH
+def run_batch(input_path, output_path):
+    '''
+    Price every scenario in 'input_path' and write the results to
+    'output_path'. Returns the number of scenarios priced.
+    '''
+    num_rows = 0
+    with open(output_path, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+        if input_path.lower().endswith(".npz"):
+            in_file = None
+            chunks = read_npz_chunks(input_path)
+        else:
+            in_file = open(input_path, "r", newline="")
+            chunks = read_csv_chunks(in_file)
+        try:
+            for calculator, first_line, rows in chunks:
+                arrays = to_arrays(calculator, first_line, rows)
+                if calculator == "investment":
+                    columns = INVESTMENT_COLUMNS
+                    results = investment_totals(arrays["deposit"], arrays["interest_rate"],
+                                                arrays["years"], arrays["compound"])
+                else:
+                    columns = BOND_COLUMNS
+                    results = bond_repayments(arrays["present_value"], arrays["interest_rate"],
+                                              arrays["months"])
+
+                if num_rows == 0:
+                    writer.writerow(columns + ["total_amount" if calculator == "investment" else "repayment"])
+                writer.writerows([row[column] for column in columns] + [result]
+                                 for row, result in zip(rows, round_results(results)))
+                num_rows += len(rows)
+        finally:
+            if in_file is not None:
+                in_file.close()
+    return num_rows
+
+def main(argv = None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python finance_batch.py INPUT.csv|INPUT.npz OUTPUT.csv")
+        return 1
+    if np is None:
+        print("ERROR: batch mode needs NumPy. Install it with 'pip install numpy'.")
+        return 1
+    try:
+        num_rows = run_batch(argv[0], argv[1])
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 1
+    print(f"{num_rows} scenarios priced. Results written to {argv[1]}.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
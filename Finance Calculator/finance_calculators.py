@@ -1,52 +1,156 @@
 # This is a calculator that allows the user to either calculate their interest
 # on an investment or calculate the amount that should be repaid on a home 
 # loan each month.
+#
+# Run it to use the calculator, or import it to use the calculations from
+# another program:
+#   from finance_calculators import simple_interest, compound_interest, bond_repayment, quote
+#   bond_repayment(250000, 7, 360)              -> 1663.26
+#   quote("investment", 1000, 5, 10, "compound") -> 1628.89
 
 import math
+from functools import lru_cache
 
-# User has to select which calculator they would like to use.
-# Regardless of how the user enters their option, it is converted to a lower-
-# case format using '.lower()'
-calculator = input('''Choose 'investment' or 'bond' from the menu below: 
+# Number of recent quotes remembered by quote().
+QUOTE_CACHE_SIZE = 4096
+
+# Bonds with an interest rate closer to 0 than this (e.g. 0.01 for 0.01%) are
+# worked out with near_zero_repayment(), as the usual formula loses accuracy.
+NEAR_ZERO_RATE = 0.01
+
+
+# -------------------- CALCULATIONS
+# Each result is rounded to 2 decimal places.
+def simple_interest(deposit, interest_rate, years):
+    '''
+    Total amount of an investment after simple interest
+    '''
+    return round(deposit * (1 +
+                            (years * (interest_rate/100))),2)
+
+def compound_interest(deposit, interest_rate, years):
+    '''
+    Total amount of an investment after compound interest
+    '''
+    return round(deposit *
+                 ((1 + (interest_rate/100)) ** years),2)
+
+def bond_repayment(present_value, interest_rate, months):
+    '''
+    Amount to repay each month on a home loan
+    '''
+    P = present_value
+    i = interest_rate/1200
+    n = months
+    if abs(interest_rate) < NEAR_ZERO_RATE:
+        return round(near_zero_repayment(P, i, n),2)
+
+    return round((i * P)/(1-((1+i)**(-n))),2)
+
+def near_zero_repayment(P, i, n):
+    '''
+    Monthly repayment, before rounding, for a very small monthly interest
+    rate i. When i is tiny, (1+i)**(-n) is so close to 1 that
+    1 - (1+i)**(-n) loses most of its digits. expm1() and log1p() work out
+    the same amount without losing them. At 0% the loan is simply split into
+    n equal payments.
+    '''
+    if i == 0:
+        return P/n
+    return (i * P)/-math.expm1(-n * math.log1p(i))
+
+
+# -------------------- QUOTES
+@lru_cache(maxsize=QUOTE_CACHE_SIZE)
+def quote(calculator, amount, interest_rate, term, interest_type = None):
+    '''
+    Returns the result of either calculator, checking the inputs first.
+    The most recent quotes are remembered, so asking for the same quote
+    again is answered straight away (see quote.cache_info()).
+    Raises ValueError if an input is invalid.
+
+    Inputs:
+    calculator: 'investment' or 'bond'
+    amount: the deposit (investment) or present value of the house (bond)
+    interest_rate: a number, e.g. 7 for 7%
+    term: number of years (investment) or months (bond)
+    interest_type: 'simple' or 'compound' (investment only)
+    '''
+    amount = float(amount)
+    interest_rate = float(interest_rate)
+    if not math.isfinite(amount) or not math.isfinite(interest_rate):
+        raise ValueError("the amount and interest rate must be numbers")
+    if not math.isfinite(float(term)) or float(term) != int(float(term)):
+        raise ValueError("the term must be a whole number")
+    term = int(float(term))
+
+    if calculator == "investment":
+        if interest_type not in ("simple", "compound"):
+            raise ValueError("interest_type must be 'simple' or 'compound'")
+        calculate = simple_interest if interest_type == "simple" else compound_interest
+    elif calculator == "bond":
+        if term < 1:
+            raise ValueError("the number of months must be at least 1")
+        calculate = bond_repayment
+    else:
+        raise ValueError("calculator must be 'investment' or 'bond'")
+
+    # A result too large for a float (e.g. compounding for 100,000 years)
+    # either raises OverflowError or comes out as infinity.
+    try:
+        result = calculate(amount, interest_rate, term)
+    except OverflowError:
+        result = math.inf
+    if not math.isfinite(result):
+        raise ValueError("the result is too large to work out")
+    return result
+
+
+# -------------------- MENU
+def main():
+    # User has to select which calculator they would like to use.
+    # Regardless of how the user enters their option, it is converted to a lower-
+    # case format using '.lower()'
+    calculator = input('''Choose 'investment' or 'bond' from the menu below: 
 
 investment - to calculate the amount of interest earned on your investment
 bond       - to calculate the amount you'll have to pay on a home loan
 ''')
-calculator = calculator.lower()
-
-# Investment calculator prompts user to enter information that will be needed
-# for carrying out the calculation.
-if calculator == "investment":
-    deposit = float(input("How much money are you depositing?: "))
-    interest_rate = float(input("Enter the interest rate (number only): "))
-    investment_years = int(input("How many years do you plan on investing?: "))
-    interest_type = input("Choose either 'simple' or 'compound' interest: ")
-    if interest_type == "simple":
-        total_amount = round(deposit * (1 + 
-                                   (investment_years * (interest_rate/100))),2)
-    elif interest_type == "compound":
-        total_amount = round(deposit * 
-                             ((1 + (interest_rate/100)) ** investment_years),2)
-    
-    print(f"Total when {interest_type} interest is applied: £{total_amount}")
-
-# Bond calculator prompts user to enter information that will be needed for
-# carrying out the calculation.
-elif calculator == "bond":
-    present_value = float(input("Enter the present value of the house: "))
-    interest_rate = float(input("Enter the interest rate (number only): "))
-    repayment_months = int(input('''Enter the number of months you plan on 
+    calculator = calculator.lower()
+
+    # Investment calculator prompts user to enter information that will be needed
+    # for carrying out the calculation.
+    if calculator == "investment":
+        deposit = float(input("How much money are you depositing?: "))
+        interest_rate = float(input("Enter the interest rate (number only): "))
+        investment_years = int(input("How many years do you plan on investing?: "))
+        interest_type = input("Choose either 'simple' or 'compound' interest: ")
+        if interest_type == "simple":
+            total_amount = simple_interest(deposit, interest_rate, investment_years)
+        elif interest_type == "compound":
+            total_amount = compound_interest(deposit, interest_rate, investment_years)
+        else:
+            print("ERROR: You have not entered a correct interest type.")
+            return
+
+        print(f"Total when {interest_type} interest is applied: £{total_amount}")
+
+    # Bond calculator prompts user to enter information that will be needed for
+    # carrying out the calculation.
+    elif calculator == "bond":
+        present_value = float(input("Enter the present value of the house: "))
+        interest_rate = float(input("Enter the interest rate (number only): "))
+        repayment_months = int(input('''Enter the number of months you plan on 
     taking to repay the bond: '''))
 
-    P = present_value
-    i = interest_rate/1200
-    n = repayment_months
+        repayment = bond_repayment(present_value, interest_rate, repayment_months)
 
-    repayment = round((i * P)/(1-((1+i)**(-n))),2)
+        print(f"You will have to repay £{repayment} each month.")
 
-    print(f"You will have to repay £{repayment} each month.")
+    # If user enters something other than 'investment' or 'bond' calculator, an
+    # error message appears.
+    else:
+        print("ERROR: You have not entered a correct option.")
 
-# If user enters something other than 'investment' or 'bond' calculator, an
-# error message appears.
-else:
-    print("ERROR: You have not entered a correct option.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+# Quote server: a long-running program that answers quotes from other local
+# programs over a Unix socket (or TCP on systems without Unix sockets), so
+# they do not have to start Python for every quote.
+# Quotes are worked out by finance_calculators.quote(), which remembers the
+# most recent ones, so quotes that are asked for again and again are answered
+# straight from memory.
+#
+# Every request and reply is a single line of JSON:
+#   {"calculator": "investment", "deposit": 1000, "interest_rate": 5,
+#    "years": 10, "interest_type": "compound"}   -> {"ok": true, "total_amount": 1628.89}
+#   {"calculator": "bond", "present_value": 250000, "interest_rate": 7,
+#    "months": 360}                              -> {"ok": true, "repayment": 1663.26}
+#   {"calculator": "cache"}  -> {"ok": true, "hits": ..., "misses": ..., "size": ...}
+# Failed requests get {"ok": false, "error": "..."}.
+#
+# Usage: python quote_server.py [--address ADDRESS]
+#        python quote_server.py --benchmark N
+# ADDRESS is 'HOST:PORT' for TCP or a path for a Unix socket (the default is
+# 'quotes.sock', or 127.0.0.1:8766 on Windows). --benchmark starts a server,
+# sends it N quotes one after another and prints how long each one took.
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import time
+from finance_calculators import quote
+
+DEFAULT_ADDRESS = "quotes.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8766"
+
+
+def parse_address(address):
+    '''
+    Returns (host, port) for a 'HOST:PORT' address, or None for a Unix
+    socket path
+    '''
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return None
+
+def answer(request):
+    '''
+    Returns the reply to a single request
+    '''
+    if not isinstance(request, dict):
+        raise ValueError("each request must be a JSON object")
+    calculator = request.get("calculator")
+    if calculator == "investment":
+        total_amount = quote("investment", request["deposit"], request["interest_rate"],
+                             request["years"], request["interest_type"])
+        return {"ok": True, "total_amount": total_amount}
+    if calculator == "bond":
+        repayment = quote("bond", request["present_value"], request["interest_rate"], request["months"])
+        return {"ok": True, "repayment": repayment}
+    if calculator == "cache":
+        info = quote.cache_info()
+        return {"ok": True, "hits": info.hits, "misses": info.misses, "size": info.currsize}
+    raise ValueError("calculator must be 'investment', 'bond' or 'cache'")
+
+
+# -------------------- SERVER
+class QuoteServer:
+    def __init__(self):
+        self.server = None
+
+    async def start(self, address = DEFAULT_ADDRESS):
+        '''
+        Start listening for clients. Returns the address actually used (e.g.
+        with the real port number if port 0 was asked for).
+        '''
+        tcp_address = parse_address(address)
+        if tcp_address is None:
+            if os.path.exists(address):
+                # Left behind by a server that did not shut down cleanly.
+                os.remove(address)
+            self.server = await asyncio.start_unix_server(self.handle_client, address)
+            return address
+        self.server = await asyncio.start_server(self.handle_client, *tcp_address)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        '''
+        Answer each line sent by a client until it disconnects. Quotes take
+        microseconds, so they are worked out straight away rather than being
+        handed to another thread.
+        '''
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = answer(json.loads(line))
+                except (ValueError, KeyError, TypeError, OverflowError) as error:
+                    reply = {"ok": False, "error": str(error)}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+# -------------------- CLIENT
+# A QuoteClient asks a running server for quotes, e.g.
+#   client = await QuoteClient.connect("quotes.sock")
+#   reply = await client.request("bond", present_value=250000, interest_rate=7, months=360)
+class QuoteClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, address = DEFAULT_ADDRESS):
+        tcp_address = parse_address(address)
+        if tcp_address is None:
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*tcp_address)
+        return cls(reader, writer)
+
+    async def request(self, calculator, **fields):
+        '''
+        Send a request and return the reply as a dictionary
+        '''
+        self.writer.write((json.dumps(dict(fields, calculator=calculator)) + "\n").encode())
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+# -------------------- RUNNING THE SERVER
+async def serve(address):
+    server = QuoteServer()
+    address = await server.start(address)
+    print(f"Serving quotes on {address}. Press Ctrl+C to stop.")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+        if parse_address(address) is None and os.path.exists(address):
+            os.remove(address)
+
+async def benchmark(num_quotes):
+    '''
+    Start a server on a free TCP port, send it 'num_quotes' quotes one at a
+    time (a few different ones, repeated, as a front end would) and print the
+    time taken for each round trip
+    '''
+    server = QuoteServer()
+    address = await server.start("127.0.0.1:0")
+    client = await QuoteClient.connect(address)
+    requests = [("bond", {"present_value": 100000 + 5000 * (number % 50), "interest_rate": 7, "months": 360})
+                if number % 2 else
+                ("investment", {"deposit": 1000 * (number % 50 + 1), "interest_rate": 5, "years": 10,
+                                "interest_type": "compound"})
+                for number in range(num_quotes)]
+    times = []
+    try:
+        for calculator, fields in requests:
+            start = time.perf_counter()
+            await client.request(calculator, **fields)
+            times.append(time.perf_counter() - start)
+        cache = await client.request("cache")
+    finally:
+        await client.close()
+        await server.stop()
+
+    times.sort()
+    print(f"{num_quotes} quotes: median {times[len(times) // 2] * 1e6:.0f} µs, "
+          f"99th percentile {times[int(len(times) * 0.99)] * 1e6:.0f} µs, "
+          f"{num_quotes / sum(times):,.0f} quotes/s")
+    print(f"Quote cache: {cache['hits']} hits, {cache['misses']} misses")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Answer finance quotes for other local programs.")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help=f"'HOST:PORT' or the path of a Unix socket (default {DEFAULT_ADDRESS})")
+    parser.add_argument("--benchmark", type=int, metavar="N",
+                        help="time N quotes against a temporary server instead of serving")
+    args = parser.parse_args(argv)
+    if args.benchmark:
+        asyncio.run(benchmark(args.benchmark))
+        return 0
+    try:
+        asyncio.run(serve(args.address))
+    except KeyboardInterrupt:
+        print("Server stopped.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
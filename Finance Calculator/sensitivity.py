@@ -0,0 +1,161 @@
+# Sensitivity grids for the finance calculators.
+# Shows how the result of the simple interest, compound interest or bond
+# calculator changes across a whole grid of interest rates and terms (and,
+# optionally, amounts), e.g. every rate from 0.1% to 15% in 0.05% steps for
+# every term from 1 to 480 months.
+#
+# The whole grid is worked out at once by broadcasting NumPy arrays: the
+# rates form a column, the terms a row and the amounts a third dimension, and
+# the calculator's formula (from finance_batch.py) is applied to all of them
+# together. Large grids are split into blocks of rates that are worked out by
+# separate processes at the same time.
+#
+# The result is saved as a .npy file (the full unrounded array, with shape
+# amounts x rates x terms) or as a CSV file with one row per amount and rate
+# and one column per term, rounded like the calculators round. How long each
+# step took is printed at the end.
+#
+# Usage:
+#   python sensitivity.py simple|compound|bond --rates START:STOP:STEP
+#                         --terms START:STOP:STEP --principal AMOUNT|START:STOP:STEP
+#                         --output GRID.csv|GRID.npy [--workers N]
+# Terms are in years for simple and compound interest and in months for
+# bonds. Ranges include both ends, e.g. --rates 0.1:15:0.05.
+
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from finance_batch import np, simple_totals, compound_totals, bond_repayments
+
+CALCULATORS = ["simple", "compound", "bond"]
+
+# Grids with fewer cells than this are worked out in a single process, as
+# starting worker processes would take longer than the calculation.
+MIN_PARALLEL_CELLS = 2_000_000
+
+
+# -------------------- GRID
+def parse_range(text, whole_numbers = False):
+    '''
+    Convert 'START:STOP:STEP' (both ends included) or a single number into an
+    array of values
+    '''
+    parts = text.split(":")
+    if len(parts) == 1:
+        values = [float(parts[0])]
+    elif len(parts) == 3:
+        start, stop, step = (float(part) for part in parts)
+        if step <= 0 or stop < start:
+            raise ValueError(f"'{text}' must go upwards in steps greater than 0")
+        # Working out the number of steps first avoids floating point error
+        # adding up over long ranges.
+        num_values = int((stop - start) / step + 1e-9) + 1
+        values = np.round(start + step * np.arange(num_values), 10)
+    else:
+        raise ValueError(f"'{text}' must be a number or START:STOP:STEP")
+    values = np.array(values, dtype=np.float64)
+    if whole_numbers and np.any(values != np.floor(values)):
+        raise ValueError(f"'{text}' must only contain whole numbers")
+    return values
+
+def evaluate(calculator, principals, rates, terms):
+    '''
+    Apply a calculator's formula to every combination of amount, rate and
+    term. Returns an array of shape (amounts, rates, terms), before rounding.
+    '''
+    P = principals[:, None, None]
+    rate = rates[None, :, None]
+    term = terms[None, None, :]
+    if calculator == "simple":
+        return simple_totals(P, rate, term)
+    if calculator == "compound":
+        return compound_totals(P, rate, term)
+    return bond_repayments(P, rate, term)
+
+def evaluate_block(arguments):
+    '''
+    Work out one block of rates. Runs in a worker process.
+    '''
+    return evaluate(*arguments)
+
+def evaluate_grid(calculator, principals, rates, terms, workers = None):
+    '''
+    Work out the whole grid, splitting the rates into blocks worked out by a
+    process pool if the grid is large
+    '''
+    num_cells = len(principals) * len(rates) * len(terms)
+    if workers == 1 or num_cells < MIN_PARALLEL_CELLS or len(rates) == 1:
+        return evaluate(calculator, principals, rates, terms)
+
+    # A few blocks per worker keeps every worker busy until the end.
+    num_blocks = min(len(rates), (workers or os.cpu_count() or 1) * 4)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        blocks = np.array_split(rates, num_blocks)
+        results = executor.map(evaluate_block, [(calculator, principals, block, terms) for block in blocks])
+        return np.concatenate(list(results), axis=1)
+
+
+# -------------------- SAVING THE GRID
+def save_grid(path, grid, principals, rates, terms):
+    '''
+    Save the grid as a .npy array, or as a CSV with a row per amount and rate
+    '''
+    if path.lower().endswith(".npy"):
+        np.save(path, grid)
+        return
+    with open(path, "w", newline="") as out_file:
+        writer = csv.writer(out_file)
+        writer.writerow(["principal", "interest_rate"] + [format_number(term) for term in terms.tolist()])
+        for principal, principal_grid in zip(principals.tolist(), grid):
+            for rate, row in zip(rates.tolist(), principal_grid):
+                writer.writerow([format_number(principal), format_number(rate)] +
+                                [round(value, 2) for value in row.tolist()])
+
+def format_number(number):
+    '''
+    Write whole numbers without '.0'
+    '''
+    return int(number) if number == int(number) else number
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Work out a calculator's results over a grid of rates and terms.")
+    parser.add_argument("calculator", choices=CALCULATORS)
+    parser.add_argument("--rates", required=True, help="interest rates, e.g. 0.1:15:0.05")
+    parser.add_argument("--terms", required=True,
+                        help="terms in years (simple, compound) or months (bond), e.g. 1:480:1")
+    parser.add_argument("--principal", required=True,
+                        help="amount deposited or house value, or a range START:STOP:STEP")
+    parser.add_argument("--output", required=True, help="GRID.csv or GRID.npy")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+    if np is None:
+        print("ERROR: sensitivity grids need NumPy. Install it with 'pip install numpy'.")
+        return 1
+
+    try:
+        rates = parse_range(args.rates)
+        terms = parse_range(args.terms, whole_numbers=True)
+        principals = parse_range(args.principal)
+        if args.calculator == "bond" and np.any(terms < 1):
+            raise ValueError("bond terms must be at least 1 month")
+
+        start = time.perf_counter()
+        grid = evaluate_grid(args.calculator, principals, rates, terms, args.workers)
+        calculated = time.perf_counter()
+        save_grid(args.output, grid, principals, rates, terms)
+        saved = time.perf_counter()
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 1
+
+    print(f"Grid of {len(principals)} amounts x {len(rates)} rates x {len(terms)} terms "
+          f"({grid.size} results) written to {args.output}.")
+    print(f"Calculating: {calculated - start:.3f}s ({grid.size / max(calculated - start, 1e-9):,.0f} results/s)")
+    print(f"Saving:      {saved - calculated:.3f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
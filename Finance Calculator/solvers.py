@@ -0,0 +1,211 @@
+# Inverse solvers for the finance calculators.
+# The calculators go forwards, from the inputs to the total amount or the
+# monthly repayment. These functions go backwards and answer questions such
+# as "what interest rate gives a £1,500 monthly repayment?", "how long will
+# it take to pay off?" or "how much can I borrow?".
+#
+# Bond (repayment = (i * P) / (1 - (1 + i) ** -n), i = interest rate / 1200):
+# - bond_principal(): how much can be borrowed           - exact formula
+# - bond_term():      how many months it takes to repay   - exact formula
+# - bond_rate():      which interest rate gives a repayment
+#   There is no formula for the rate, so it is found with Newton's method,
+#   falling back to halving the search range (bisection) whenever a Newton
+#   step would leave it. This always converges.
+# Compound interest (total = deposit * (1 + r/100) ** years):
+# - compound_deposit(), compound_rate(), compound_years() - exact formulas
+#
+# Every function takes single numbers or NumPy arrays (one value per
+# scenario) and solves all of the scenarios at once. Results are unrounded.
+# Scenarios with no answer (e.g. a repayment too small to ever cover the
+# interest) give nan.
+#
+# Usage: python solvers.py bond rate --repayment 1500 --principal 250000 --months 360
+#        python solvers.py bond principal --repayment 1500 --rate 5 --months 360
+#        python solvers.py bond term --repayment 1500 --principal 250000 --rate 5
+#        python solvers.py compound rate|deposit|years --total T [--deposit D] [--rate R] [--years Y]
+
+import argparse
+import sys
+from finance_batch import np
+
+# The rate solver stops once every monthly rate is this close to its answer.
+RATE_TOLERANCE = 1e-15
+MAX_ITERATIONS = 100
+
+
+def as_arrays(*values):
+    '''
+    Convert the inputs into float arrays of the same shape
+    '''
+    return np.broadcast_arrays(*[np.asarray(value, dtype=np.float64) for value in values])
+
+def to_result(result, *values):
+    '''
+    Return a plain number if every input was a single number
+    '''
+    if all(np.ndim(value) == 0 for value in values):
+        return float(result)
+    return result
+
+
+# -------------------- BOND
+def bond_principal(repayment, interest_rate, months):
+    '''
+    Amount that can be borrowed for a monthly repayment, interest rate (e.g.
+    7 for 7%) and number of months
+    '''
+    A, rate, n = as_arrays(repayment, interest_rate, months)
+    i = rate/1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # 1 - (1+i)**(-n), without losing digits when i is small
+        P = np.where(i == 0, A * n, A * -np.expm1(-n * np.log1p(i)) / i)
+    return to_result(P, repayment, interest_rate, months)
+
+def bond_term(repayment, principal, interest_rate):
+    '''
+    Number of months needed to repay a loan. The answer is usually not a
+    whole number - round it up to get the number of repayments.
+    Gives nan if the repayment does not even cover the first month's interest.
+    '''
+    A, P, rate = as_arrays(repayment, principal, interest_rate)
+    i = rate/1200
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # From (1 + i) ** -n = 1 - i * P / A
+        n = np.where(i == 0, P / A, -np.log1p(-i * P / A) / np.log1p(i))
+    n = np.where((A > i * P) & (A > 0), n, np.nan)
+    return to_result(n, repayment, principal, interest_rate)
+
+def bond_rate(repayment, principal, months):
+    '''
+    Yearly interest rate (e.g. 7 for 7%) that gives a monthly repayment.
+    Gives nan if the repayment is less than principal / months (that would
+    need a negative interest rate).
+    '''
+    A, P, n = (array.ravel() for array in as_arrays(repayment, principal, months))
+
+    def repayment_and_slope(i, P, n):
+        '''
+        Repayment at monthly rate i, and how fast it changes with i
+        '''
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # (1+i)**(-n) and 1 - (1+i)**(-n), without losing digits when i is small
+            exponent = -n * np.log1p(i)
+            discount = np.exp(exponent)
+            denominator = -np.expm1(exponent)
+            value = np.where(i == 0, P / n, i * P / denominator)
+            slope = np.where(i == 0, P * (n + 1) / (2 * n),
+                             P / denominator - i * P * n * discount / ((1+i) * denominator**2))
+        return value, slope
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        solvable = (A >= P / n) & (P > 0) & (n > 0)
+    # Scenarios that cannot be solved are left as nan.
+    i = np.full(A.shape, np.nan)
+
+    # Only the scenarios that have not converged yet are worked on, so each
+    # pass gets quicker. 'rows' holds their positions in the full arrays.
+    rows = np.flatnonzero(solvable)
+    A_left, P_left, n_left = A[rows], P[rows], n[rows]
+    # The answer lies between 0 and A / P: the repayment is always more than
+    # the interest alone (i * P).
+    low = np.zeros(len(rows))
+    high = A_left / P_left
+    # Start near the interest-only rate, which is close for long loans.
+    guess = np.clip(high - 1 / n_left, 0, high) * 0.5 + high * 0.25
+    for _ in range(MAX_ITERATIONS):
+        if len(rows) == 0:
+            break
+        value, slope = repayment_and_slope(guess, P_left, n_left)
+        error = value - A_left
+        # Keep the part of the range that still contains the answer.
+        too_high = error > 0
+        low = np.where(too_high, low, guess)
+        high = np.where(too_high, guess, high)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = guess - error / slope
+        inside = (newton > low) & (newton < high)
+        new_guess = np.where(inside, newton, (low + high) / 2)
+        # A guess that gives the repayment exactly is kept as it is.
+        new_guess = np.where(error == 0, guess, new_guess)
+        converged = np.abs(new_guess - guess) <= RATE_TOLERANCE * np.maximum(1, new_guess)
+        i[rows[converged]] = new_guess[converged]
+
+        keep = ~converged
+        rows, A_left, P_left, n_left = rows[keep], A_left[keep], P_left[keep], n_left[keep]
+        guess, low, high = new_guess[keep], low[keep], high[keep]
+    # Any scenario still going after MAX_ITERATIONS keeps its latest guess.
+    i[rows] = guess
+
+    rate = (i * 1200).reshape(np.broadcast_shapes(np.shape(repayment), np.shape(principal), np.shape(months)))
+    return to_result(rate, repayment, principal, months)
+
+
+# -------------------- COMPOUND INTEREST
+def compound_deposit(total_amount, interest_rate, years):
+    '''
+    Deposit needed to reach a total amount
+    '''
+    total, rate, y = as_arrays(total_amount, interest_rate, years)
+    return to_result(total / (1 + rate/100) ** y, total_amount, interest_rate, years)
+
+def compound_rate(total_amount, deposit, years):
+    '''
+    Yearly interest rate (e.g. 7 for 7%) needed to grow a deposit into a total
+    amount
+    '''
+    total, D, y = as_arrays(total_amount, deposit, years)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = 100 * np.expm1(np.log(total / D) / y)
+    return to_result(rate, total_amount, deposit, years)
+
+def compound_years(total_amount, deposit, interest_rate):
+    '''
+    Number of years needed to grow a deposit into a total amount (usually not
+    a whole number)
+    '''
+    total, D, rate = as_arrays(total_amount, deposit, interest_rate)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        y = np.log(total / D) / np.log1p(rate/100)
+    return to_result(y, total_amount, deposit, interest_rate)
+
+
+# -------------------- COMMAND LINE
+SOLVERS = {
+    ("bond", "principal"): (bond_principal, ["repayment", "rate", "months"]),
+    ("bond", "term"): (bond_term, ["repayment", "principal", "rate"]),
+    ("bond", "rate"): (bond_rate, ["repayment", "principal", "months"]),
+    ("compound", "deposit"): (compound_deposit, ["total", "rate", "years"]),
+    ("compound", "rate"): (compound_rate, ["total", "deposit", "years"]),
+    ("compound", "years"): (compound_years, ["total", "deposit", "rate"]),
+}
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Work backwards from a repayment or total amount.")
+    parser.add_argument("calculator", choices=["bond", "compound"])
+    parser.add_argument("unknown", help="what to solve for: principal, term or rate (bond); "
+                                        "deposit, rate or years (compound)")
+    for name in ["repayment", "principal", "rate", "months", "total", "deposit", "years"]:
+        parser.add_argument(f"--{name}", type=float)
+    args = parser.parse_args(argv)
+    if np is None:
+        print("ERROR: the solvers need NumPy. Install it with 'pip install numpy'.")
+        return 1
+    if (args.calculator, args.unknown) not in SOLVERS:
+        print(f"ERROR: cannot solve for '{args.unknown}' with the {args.calculator} calculator.")
+        return 1
+
+    solver, inputs = SOLVERS[(args.calculator, args.unknown)]
+    missing = [name for name in inputs if getattr(args, name) is None]
+    if missing:
+        print(f"ERROR: also give {', '.join('--' + name for name in missing)}.")
+        return 1
+    answer = solver(*[getattr(args, name) for name in inputs])
+    if np.isnan(answer):
+        print("There is no answer for these values.")
+        return 1
+    print(f"{args.unknown}: {round(answer, 2)}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,69 @@
+### -------------------- PROGRAM EXPLANATION
+# Benchmark for loading tasks.txt.
+# Writes a temporary tasks file (500,000 lines by default) and compares how
+# long it takes to load it:
+# - the original way: Task() followed by from_string() for every line.
+# - with task_loader.load_tasks() into a TaskTable.
+#
+# Usage: python bench_loader.py [number of lines]
+
+
+# Importing required modules
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from task_table import Task, TaskTable, DATETIME_STRING_FORMAT
+from task_loader import load_tasks, parse_day
+
+NUM_LINES = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+
+def write_sample_file(path, num_lines):
+    '''
+    Write 'num_lines' made-up tasks spread over a few years of dates
+    '''
+    first_day = date(2019, 1, 1)
+    with open(path, "w") as task_file:
+        for line in range(num_lines):
+            assigned = first_day + timedelta(days=random.randint(0, 1000))
+            due = assigned + timedelta(days=random.randint(0, 90))
+            task_file.write(f"user{line % 100}, Task {line}, Description of task {line}, "
+                            f"{due.strftime(DATETIME_STRING_FORMAT)}, "
+                            f"{assigned.strftime(DATETIME_STRING_FORMAT)}, "
+                            f"{'Yes' if line % 3 == 0 else 'No'}\n")
+
+def load_original(path):
+    with open(path, "r") as task_file:
+        task_data = [t for t in task_file.read().split("\n") if t != ""]
+    task_list = []
+    for t_str in task_data:
+        curr_t = Task()
+        curr_t.from_string(t_str)
+        task_list.append(curr_t)
+    return task_list
+
+def load_fast(path):
+    parse_day.cache_clear()
+    task_table = TaskTable()
+    with open(path, "r") as task_file:
+        load_tasks(task_file, task_table)
+    return task_table
+
+def time_it(function, path):
+    start = time.perf_counter()
+    result = function(path)
+    return time.perf_counter() - start, len(result)
+
+with tempfile.TemporaryDirectory() as temp_dir:
+    path = os.path.join(temp_dir, "tasks.txt")
+    write_sample_file(path, NUM_LINES)
+
+    original_time, original_count = time_it(load_original, path)
+    fast_time, fast_count = time_it(load_fast, path)
+
+    print(f"Lines loaded: \t\t\t {original_count} / {fast_count}")
+    print(f"Task() + from_string(): \t {original_time:.2f}s")
+    print(f"load_tasks() into TaskTable: \t {fast_time:.2f}s")
+    print(f"Speed-up: \t\t\t {original_time/fast_time:.1f}x")
@@ -0,0 +1,179 @@
+### -------------------- PROGRAM EXPLANATION
+# Benchmark suite for the task manager.
+# For each scale (number of tasks) a temporary folder is filled with made-up
+# users and tasks (see task_generator.py) and the following are timed:
+# - startup: reading tasks.txt, in full and in lazy mode (the second lazy
+#   start reuses the line index saved by the first),
+# - add_task: adding tasks one at a time, including writing the journal,
+# - view_mine: looking up and formatting every task of the busiest user and
+#   of a typical user,
+# - generate_reports: writing task_overview.txt and user_overview.txt,
+# - display_stats: the 'ds' option, both when the reports must be generated
+#   and when the saved reports can be used.
+# Results are printed and saved as JSON, so runs can be compared over time.
+# Give '--compare' an earlier results file to see what has got faster or
+# slower.
+#
+# Usage: python bench_suite.py [--scales 1000,100000,1000000] [--users N]
+#                              [--repeat N] [--output FILE] [--compare FILE]
+
+
+# Importing required modules
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import datetime, date, timedelta
+import task_manager
+import report_cache
+from task_core import Task, generate_reports
+from task_storage import TextStorage
+from task_listing import select_tasks, write_pages
+from task_generator import write_data
+
+DEFAULT_SCALES = "1000,100000,1000000"
+NUM_ADDS = 1000
+
+def best_time(function, repeat):
+    '''
+    Run 'function' 'repeat' times and return the fastest time in seconds
+    '''
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+def remove_reports():
+    for name in ("task_overview.txt", "user_overview.txt", "report_stamp.txt"):
+        if os.path.exists(name):
+            os.remove(name)
+
+### -------------------- BENCHMARKS
+def run_scale(num_tasks, num_users, repeat):
+    '''
+    Run every benchmark on 'num_tasks' tasks in the current folder.
+    Returns a list of result dictionaries.
+    '''
+    results = []
+
+    def record(benchmark, seconds, operations = 1):
+        results.append({"scale": num_tasks, "benchmark": benchmark, "seconds": seconds,
+                        "operations": operations, "seconds_per_operation": seconds / operations})
+        print(f"  {benchmark:<28} {seconds:10.4f}s" +
+              (f"  ({seconds / operations * 1e6:.1f}us each)" if operations > 1 else ""))
+
+    start = time.perf_counter()
+    users = write_data(".", num_users, num_tasks)
+    record("generate_data", time.perf_counter() - start)
+
+    # Startup
+    record("startup", best_time(lambda: TextStorage(), repeat))
+    start = time.perf_counter()
+    TextStorage(lazy=True)
+    record("startup_lazy_first", time.perf_counter() - start)
+    record("startup_lazy", best_time(lambda: TextStorage(lazy=True), repeat))
+
+    storage = TextStorage()
+
+    # Looking up a user's tasks, for the busiest user and a typical one.
+    usernames = list(users)
+    for label, username in (("busiest", usernames[0]), ("typical", usernames[len(usernames) // 2])):
+        num_found = len(storage.tasks_for(username))
+        seconds = best_time(lambda: write_pages(select_tasks(storage, username=username),
+                                                out=io.StringIO()), repeat)
+        record(f"view_mine_{label}", seconds)
+        results[-1]["tasks_found"] = num_found
+
+    # Reports
+    def generate():
+        generate_reports(storage, users)
+    record("generate_reports", best_time(generate, repeat))
+
+    task_manager.storage = storage
+    task_manager.username_password = users
+    task_manager.curr_user = "admin"
+
+    def display_cold():
+        remove_reports()
+        report_cache.cached_reports["version"] = None
+        with redirect_stdout(io.StringIO()):
+            task_manager.display_stats()
+
+    def display_cached():
+        with redirect_stdout(io.StringIO()):
+            task_manager.display_stats()
+
+    record("display_stats_generate", best_time(display_cold, repeat))
+    record("display_stats_cached", best_time(display_cached, repeat))
+
+    # Adding tasks (last, as it changes the tasks).
+    due_date = datetime.combine(date.today() + timedelta(days=7), datetime.min.time())
+    assigned_date = datetime.combine(date.today(), datetime.min.time())
+    num_adds = min(NUM_ADDS, max(num_tasks, 1))
+    start = time.perf_counter()
+    for number in range(num_adds):
+        storage.add_task(Task(usernames[number % len(usernames)], f"Benchmark task {number}",
+                              "Added by bench_suite.py", due_date, assigned_date, False))
+    record("add_task", time.perf_counter() - start, num_adds)
+    remove_reports()
+    return results
+
+### -------------------- COMPARING RESULTS
+def compare(results, baseline_path):
+    '''
+    Print how much each benchmark has changed since an earlier run
+    '''
+    with open(baseline_path, "r") as baseline_file:
+        baseline = {(r["scale"], r["benchmark"]): r for r in json.load(baseline_file)["results"]}
+    print(f"\nCompared with {baseline_path} (negative is faster):")
+    for result in results:
+        before = baseline.get((result["scale"], result["benchmark"]))
+        if before is None or before["seconds_per_operation"] == 0:
+            continue
+        change = (result["seconds_per_operation"] / before["seconds_per_operation"] - 1) * 100
+        print(f"  {result['scale']:>9} {result['benchmark']:<28} {change:+7.1f}%")
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Benchmark the task manager on made-up data.")
+    parser.add_argument("--scales", default=DEFAULT_SCALES,
+                        help=f"comma separated numbers of tasks (default {DEFAULT_SCALES})")
+    parser.add_argument("--users", type=int, default=100, help="number of users (default 100)")
+    parser.add_argument("--repeat", type=int, default=3, help="runs of each benchmark, fastest is kept")
+    parser.add_argument("--output", default="bench_results.json", help="where to save the results")
+    parser.add_argument("--compare", help="an earlier results file to compare with")
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    output_path = os.path.abspath(args.output)
+    compare_path = os.path.abspath(args.compare) if args.compare else None
+
+    results = []
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            for num_tasks in scales:
+                print(f"{num_tasks} tasks, {args.users} users:")
+                results += run_scale(num_tasks, args.users, args.repeat)
+        finally:
+            os.chdir(original_dir)
+
+    with open(output_path, "w") as output_file:
+        json.dump({"python": platform.python_version(), "platform": platform.platform(),
+                   "date": datetime.now().isoformat(timespec="seconds"),
+                   "users": args.users, "repeat": args.repeat, "results": results},
+                  output_file, indent=2)
+    print(f"\nResults saved to {output_path}.")
+    if compare_path:
+        compare(results, compare_path)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,62 @@
+### -------------------- PROGRAM EXPLANATION
+# This module provides an advisory lock on a file, so that several copies of
+# the task manager running at the same time take turns changing the tasks
+# instead of overwriting each other's changes.
+# The lock is "advisory": it only works between programs that also use it,
+# which all of the task manager's programs do. fcntl is used on Linux and
+# macOS and msvcrt on Windows.
+
+
+# Importing required modules
+import time
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+### -------------------- DEFINING FILE LOCK CLASS
+# A FileLock is used with 'with', e.g.
+#   with FileLock("tasks.txt.lock"):
+#       ... change the tasks ...
+# It can be entered again while it is already held (e.g. a method that holds
+# the lock calling another one that takes it too); it is only released when
+# the outermost 'with' finishes.
+class FileLock:
+    def __init__(self, path):
+        '''
+        Inputs:
+        path: String - path to the lock file (created if it does not exist)
+        '''
+        self.path = path
+        self.depth = 0
+        self.lock_file = None
+
+    def __enter__(self):
+        if self.depth == 0:
+            self.lock_file = open(self.path, "a+")
+            if fcntl is not None:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                # msvcrt gives up after about 10 seconds, so keep trying.
+                self.lock_file.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.01)
+        self.depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self.depth -= 1
+        if self.depth == 0:
+            if fcntl is not None:
+                fcntl.flock(self.lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.lock_file.seek(0)
+                msvcrt.locking(self.lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            self.lock_file.close()
+            self.lock_file = None
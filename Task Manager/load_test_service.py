@@ -0,0 +1,183 @@
+### -------------------- PROGRAM EXPLANATION
+# Load test for running many copies of the task manager at the same time.
+# Everything happens in a temporary folder, so the real tasks are not touched.
+# - Service mode: starts task_service.py and connects many clients at once.
+#   Each client adds tasks, completes every fourth one and lists its own
+#   tasks now and then. Afterwards the tasks are read back from disk and
+#   checked: every task must be there exactly once with the right completion.
+# - Standalone mode: several processes use tasks.txt directly at the same
+#   time, relying on the file lock, and the same checks are made.
+# The number of requests per second and how many changes were written per
+# group commit are printed.
+#
+# Usage: python load_test_service.py [--clients N] [--requests N]
+#                                    [--processes N] [--sqlite]
+
+
+# Importing required modules
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, date
+from multiprocessing import Process
+from task_core import Task, open_storage
+from task_service import TaskService, TaskClient
+
+DUE_DATE = "18 Jun 2030"
+
+def check_tasks(storage, expected_titles, expected_completed):
+    '''
+    Check that every expected task is stored exactly once and that the right
+    ones are completed. Returns a list of problems found.
+    '''
+    problems = []
+    titles = {}
+    for _, task in storage.iter_tasks():
+        titles[task.title] = titles.get(task.title, 0) + 1
+        if bool(task.completed) != (task.title in expected_completed):
+            problems.append(f"'{task.title}' has the wrong completion")
+    missing = expected_titles - set(titles)
+    duplicated = [title for title, count in titles.items() if count > 1]
+    if missing:
+        problems.append(f"{len(missing)} tasks were lost")
+    if duplicated:
+        problems.append(f"{len(duplicated)} tasks were stored more than once")
+    return problems
+
+### -------------------- SERVICE MODE
+async def run_client(address, client_number, num_requests, latencies):
+    '''
+    Add 'num_requests' tasks, completing every fourth one
+    '''
+    client = await TaskClient.connect(address)
+    for request_number in range(num_requests):
+        start = time.perf_counter()
+        reply = await client.request("add", username=f"client{client_number}",
+                                     title=f"Client {client_number} task {request_number}",
+                                     description="Load test", due_date=DUE_DATE)
+        latencies.append(time.perf_counter() - start)
+        if not reply["ok"]:
+            raise RuntimeError(reply["error"])
+        if request_number % 4 == 0:
+            reply = await client.request("complete", task_number=reply["task_number"])
+            if not reply["ok"]:
+                raise RuntimeError(reply["error"])
+        if request_number % 50 == 0:
+            await client.request("list", username=f"client{client_number}", page_size=20)
+    await client.close()
+
+async def load_test_service(storage, num_clients, num_requests):
+    '''
+    Run every client at once against a service. Returns (seconds taken,
+    latencies of the 'add' requests, changes per group commit).
+    '''
+    service = TaskService(storage)
+    address = await service.start("tasks.sock" if hasattr(asyncio, "start_unix_server") else "127.0.0.1:0")
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[run_client(address, client_number, num_requests, latencies)
+                           for client_number in range(num_clients)])
+    seconds = time.perf_counter() - start
+    await service.stop()
+    return seconds, latencies, service.num_writes / max(service.num_commits, 1)
+
+### -------------------- STANDALONE MODE
+def run_process(process_number, num_requests):
+    '''
+    Add tasks straight to tasks.txt, completing every fourth one
+    '''
+    storage = open_storage()
+    for request_number in range(num_requests):
+        storage.add_task(Task(f"client{process_number}", f"Client {process_number} task {request_number}",
+                              "Load test", datetime.strptime(DUE_DATE, "%d %b %Y"), date.today(), False))
+        if request_number % 4 == 0:
+            # Find the task again, as other processes may have added tasks
+            # since.
+            storage.sync()
+            for position in reversed(storage.tasks_for(f"client{process_number}")):
+                if storage.get_task(position).title == f"Client {process_number} task {request_number}":
+                    storage.complete_task(position)
+                    break
+    storage.close()
+
+def load_test_standalone(num_processes, num_requests):
+    '''
+    Run every process at once. Returns the seconds taken.
+    '''
+    processes = [Process(target=run_process, args=(process_number, num_requests))
+                 for process_number in range(num_processes)]
+    start = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    return time.perf_counter() - start
+
+### -------------------- RUNNING THE LOAD TEST
+def expected_tasks(num_clients, num_requests):
+    titles = {f"Client {c} task {r}" for c in range(num_clients) for r in range(num_requests)}
+    completed = {f"Client {c} task {r}" for c in range(num_clients) for r in range(0, num_requests, 4)}
+    return titles, completed
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Load test the task service and the file lock.")
+    parser.add_argument("--clients", type=int, default=20, help="clients connected to the service at once")
+    parser.add_argument("--requests", type=int, default=500, help="tasks added by each client")
+    parser.add_argument("--processes", type=int, default=4, help="standalone processes run at once")
+    parser.add_argument("--sqlite", action="store_true", help="test the service with tasks.db")
+    args = parser.parse_args(argv)
+
+    problems = []
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as temp_dir:
+        os.chdir(temp_dir)
+        try:
+            num_users = max(args.clients, args.processes)
+            with open("user.txt", "w") as user_file:
+                user_file.write("\n".join(["admin;password"] + [f"client{n};password" for n in range(num_users)]))
+            storage_args = ["--sqlite"] if args.sqlite else []
+            if args.sqlite:
+                storage = open_storage(storage_args)
+                storage.add_users({f"client{n}": "password" for n in range(num_users)})
+                storage.close()
+
+            storage = open_storage(storage_args)
+            seconds, latencies, batch_size = asyncio.run(
+                load_test_service(storage, args.clients, args.requests))
+            storage.close()
+            num_writes = args.clients * (args.requests + (args.requests + 3) // 4)
+            latencies.sort()
+            print(f"Service ({'SQLite' if args.sqlite else 'text files'}): {args.clients} clients, "
+                  f"{num_writes} changes in {seconds:.2f}s ({num_writes / seconds:.0f} changes/s)")
+            print(f"  add latency: median {latencies[len(latencies)//2]*1000:.1f}ms, "
+                  f"99th percentile {latencies[int(len(latencies)*0.99)]*1000:.1f}ms")
+            print(f"  {batch_size:.1f} changes written per group commit on average")
+
+            storage = open_storage(storage_args)
+            problems += check_tasks(storage, *expected_tasks(args.clients, args.requests))
+            storage.close()
+
+            # The standalone test always uses tasks.txt, starting afresh.
+            for path in ("tasks.txt", "tasks.journal"):
+                if os.path.exists(path):
+                    os.remove(path)
+            seconds = load_test_standalone(args.processes, args.requests)
+            num_writes = args.processes * (args.requests + (args.requests + 3) // 4)
+            print(f"Standalone: {args.processes} processes, {num_writes} changes in {seconds:.2f}s "
+                  f"({num_writes / seconds:.0f} changes/s)")
+            storage = open_storage()
+            problems += check_tasks(storage, *expected_tasks(args.processes, args.requests))
+            storage.close()
+        finally:
+            os.chdir(original_dir)
+
+    for problem in problems:
+        print(f"PROBLEM: {problem}")
+    print("No changes were lost." if not problems else "Changes were lost!")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,21 @@
+### -------------------- PROGRAM EXPLANATION
+# One-off tool that copies the tasks in tasks.txt (including any changes still
+# in tasks.journal) and the users in user.txt into a new SQLite database.
+# Afterwards run 'python task_manager.py --sqlite' to use the database.
+#
+# Usage: python migrate_to_sqlite.py [tasks.txt] [user.txt] [tasks.db]
+
+
+# Importing required modules
+import sys
+from task_storage import TextStorage, import_text_files
+
+tasks_path, users_path, db_path = (sys.argv[1:] + ["tasks.txt", "user.txt", "tasks.db"][len(sys.argv)-1:])[:3]
+
+try:
+    num_tasks, num_users = import_text_files(TextStorage(tasks_path, users_path), db_path)
+except ValueError as error:
+    print(f"ERROR: {error}")
+    sys.exit(1)
+
+print(f"Copied {num_tasks} tasks and {num_users} users into {db_path}.")
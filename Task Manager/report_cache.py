@@ -0,0 +1,65 @@
+### -------------------- PROGRAM EXPLANATION
+# This module makes sure the reports are only generated when something has
+# changed.
+# When the reports are generated, a version string describing the tasks and
+# users (see data_version() in task_storage.py) and today's date is saved in
+# 'report_stamp.txt'. Next time the reports are wanted, they are only
+# generated again if that version has changed; otherwise the existing
+# task_overview.txt and user_overview.txt are used straight away.
+# Today's date is part of the version because overdue counts depend on it.
+
+
+# Importing required modules
+import os
+from datetime import date
+from task_core import generate_reports
+
+REPORT_FILES = ["task_overview.txt", "user_overview.txt"]
+STAMP_PATH = "report_stamp.txt"
+
+# Contents of the reports already read by this program, with their version.
+cached_reports = {"version": None, "contents": None}
+
+def report_version(storage):
+    '''
+    Returns the version of the data the reports would be generated from
+    '''
+    return f"{date.today().isoformat()}|{storage.data_version()}"
+
+def saved_version():
+    '''
+    Returns the version the report files were last generated from, or None
+    '''
+    if not all(os.path.exists(report) for report in REPORT_FILES + [STAMP_PATH]):
+        return None
+    with open(STAMP_PATH, "r") as stamp_file:
+        return stamp_file.read()
+
+def get_reports(storage, username_password, force = False):
+    '''
+    Returns (contents of each report file, whether they were regenerated).
+    Both reports are generated together, and only if the tasks or users have
+    changed since they were last generated (or 'force' is True).
+
+    Inputs:
+    storage: TextStorage or SQLiteStorage holding the tasks
+    username_password: dictionary of username-password key-value pairs
+    force: Boolean - generate the reports even if nothing has changed
+    '''
+    version = report_version(storage)
+    if not force and cached_reports["version"] == version:
+        return cached_reports["contents"], False
+
+    regenerated = force or saved_version() != version
+    if regenerated:
+        generate_reports(storage, username_password)
+        with open(STAMP_PATH, "w") as stamp_file:
+            stamp_file.write(version)
+
+    contents = {}
+    for report in REPORT_FILES:
+        with open(report, "r") as report_file:
+            contents[report] = report_file.read()
+    cached_reports["version"] = version
+    cached_reports["contents"] = contents
+    return contents, regenerated
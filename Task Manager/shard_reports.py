@@ -0,0 +1,146 @@
+### -------------------- PROGRAM EXPLANATION
+# Organisation-wide reports for teams that each keep their own tasks file.
+# Every tasks file (shard) in a folder is read and counted by a separate
+# worker process, so the work is spread over all of the computer's cores.
+# Each worker sends back only its counters (tasks, completed and overdue, in
+# total and for each user), which are then added together and written to
+# task_overview.txt and user_overview.txt in the usual layout.
+#
+# A shard is any 'tasks*.txt' file in the folder, or a 'tasks.txt' in any
+# folder inside it, e.g.
+#   teams/tasks_sales.txt            or   teams/sales/tasks.txt
+#   teams/tasks_support.txt               teams/support/tasks.txt
+# Changes still in a shard's journal are included. The users listed in
+# user_overview.txt are those in any user.txt next to a shard, followed by
+# anyone else who has tasks.
+#
+# The reports are written to the 'shard_reports' folder unless --output-dir
+# says otherwise, so the reports of the local tasks file are left alone. If
+# they are written over the local reports anyway, report_stamp.txt is removed
+# so the local reports are generated again next time they are wanted.
+#
+# Usage: python shard_reports.py FOLDER [--workers N] [--output-dir FOLDER]
+
+
+# Importing required modules
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from task_table import TaskTable
+from task_journal import TaskJournal
+from task_stats import TaskStats, TASKS, COMPLETED, OVERDUE
+from task_core import write_reports
+from report_cache import STAMP_PATH
+
+DEFAULT_OUTPUT_DIR = "shard_reports"
+
+### -------------------- FINDING SHARDS
+def find_shards(folder):
+    '''
+    Returns the paths of every tasks file in 'folder', in name order
+    '''
+    shards = glob.glob(os.path.join(folder, "tasks*.txt")) + \
+             glob.glob(os.path.join(folder, "*", "tasks.txt"))
+    return sorted(set(shards))
+
+def read_usernames(shards):
+    '''
+    Returns every username in the user.txt files next to the shards, without
+    repeats
+    '''
+    usernames = {}
+    for user_path in sorted({os.path.join(os.path.dirname(shard), "user.txt") for shard in shards}):
+        if not os.path.exists(user_path):
+            continue
+        with open(user_path, "r") as user_file:
+            for user in user_file.read().split("\n"):
+                if user != "":
+                    usernames[user.split(";")[0]] = None
+    return list(usernames)
+
+### -------------------- COUNTING SHARDS
+def count_shard(shard, today):
+    '''
+    Read one shard (and its journal) and count its tasks. Runs in a worker
+    process.
+
+    Returns (totals, users): totals is [tasks, completed, overdue] and users
+    maps each username to the same three counters.
+    '''
+    journal_path = os.path.splitext(shard)[0] + ".journal"
+    task_list = TaskJournal(shard, journal_path).load(TaskTable())
+    task_stats = TaskStats(task_list, today)
+    # Only the counters are sent back, not the tasks.
+    return task_stats.totals, task_stats.users
+
+def merge_counts(partial_counts):
+    '''
+    Add together the counters returned by count_shard() for every shard
+    '''
+    totals = [0, 0, 0]
+    users = {}
+    for shard_totals, shard_users in partial_counts:
+        for counter in (TASKS, COMPLETED, OVERDUE):
+            totals[counter] += shard_totals[counter]
+        for username, counts in shard_users.items():
+            user_counts = users.setdefault(username, [0, 0, 0])
+            for counter in (TASKS, COMPLETED, OVERDUE):
+                user_counts[counter] += counts[counter]
+    return totals, users
+
+def count_shards(shards, workers = None, today = None):
+    '''
+    Count every shard, in parallel unless 'workers' is 1.
+    Returns the merged (totals, users) counters.
+    '''
+    today = today or date.today()
+    if workers == 1 or len(shards) <= 1:
+        return merge_counts(count_shard(shard, today) for shard in shards)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return merge_counts(executor.map(count_shard, shards, [today] * len(shards)))
+
+### -------------------- WRITING REPORTS
+def generate_shard_reports(folder, workers = None, output_dir = DEFAULT_OUTPUT_DIR):
+    '''
+    Write task_overview.txt and user_overview.txt for every shard in 'folder'
+    together. Returns the number of shards read.
+    '''
+    shards = find_shards(folder)
+    if not shards:
+        raise ValueError(f"No tasks files found in {folder}")
+    totals, users = count_shards(shards, workers)
+
+    usernames = read_usernames(shards)
+    usernames += sorted(set(users) - set(usernames))
+
+    def user_counts(username):
+        tasks, completed, overdue = users.get(username, (0, 0, 0))
+        return tasks, completed, tasks - completed, overdue
+
+    tasks, completed, overdue = totals
+    os.makedirs(output_dir, exist_ok=True)
+    write_reports((tasks, completed, tasks - completed, overdue), user_counts, usernames, output_dir)
+    # The saved stamp no longer describes the reports in this folder.
+    stamp_path = os.path.join(output_dir, STAMP_PATH)
+    if os.path.exists(stamp_path):
+        os.remove(stamp_path)
+    return len(shards)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write reports covering every team's tasks file.")
+    parser.add_argument("folder", help="folder holding the tasks files")
+    parser.add_argument("--workers", type=int, help="number of worker processes (default: one per core)")
+    parser.add_argument("--output-dir", default=DEFAULT_OUTPUT_DIR,
+                        help=f"where to write the reports (default {DEFAULT_OUTPUT_DIR})")
+    args = parser.parse_args()
+    try:
+        num_shards = generate_shard_reports(args.folder, args.workers, args.output_dir)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        sys.exit(1)
+    print(f"Reports for {num_shards} tasks files written to "
+          f"{os.path.join(args.output_dir, 'task_overview.txt')} and "
+          f"{os.path.join(args.output_dir, 'user_overview.txt')}.")
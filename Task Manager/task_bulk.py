@@ -0,0 +1,182 @@
+### -------------------- PROGRAM EXPLANATION
+# This module imports and exports many tasks at once using CSV or JSON Lines
+# (.jsonl, one JSON object per line) files.
+# - Imports read the file one row at a time and check the rows in batches
+#   with the same rules as adding a task by hand: the user must exist and the
+#   text must be safe to store. Only once every row has been checked are the
+#   tasks stored, with a single write.
+# - Exports write one task at a time, so files of any size can be produced
+#   without building the whole file in memory.
+#
+# Both formats use the columns: username, title, description, due_date,
+# assigned_date, completed. Dates are written as 'DD MMM YYYY' (e.g.
+# 18 Jun 2019) and completed as Yes or No. When importing, assigned_date
+# defaults to today and completed defaults to No.
+
+
+# Importing required modules
+import csv
+import json
+import os
+from datetime import date, datetime
+from task_table import Task, DATETIME_STRING_FORMAT
+from task_loader import parse_day
+from task_core import is_safe_string
+
+COLUMNS = ["username", "title", "description", "due_date", "assigned_date", "completed"]
+
+# Number of rows checked together before moving on to the next batch.
+BATCH_SIZE = 1000
+
+### -------------------- READING FILES
+def file_format(path):
+    '''
+    Work out the format of a file from its extension ('csv' or 'jsonl')
+    '''
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"{path} must end in .csv or .jsonl")
+
+def read_rows(in_file, format):
+    '''
+    Yields (line number, row dictionary) for each row of an open CSV or JSON
+    Lines file
+    '''
+    if format == "csv":
+        reader = csv.DictReader(in_file)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(in_file, 1):
+        if line.strip() == "":
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as error:
+            row = error
+        yield line_number, row
+
+def read_batches(rows, batch_size = BATCH_SIZE):
+    '''
+    Group rows into lists of up to 'batch_size' rows
+    '''
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+### -------------------- CHECKING ROWS
+def parse_completed(value):
+    '''
+    Convert Yes/No, true/false, 1/0 (or a JSON true/false) into a Boolean
+    '''
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("yes", "true", "1"):
+        return True
+    if text in ("no", "false", "0", ""):
+        return False
+    raise ValueError(f"completed must be Yes or No, not '{value}'")
+
+def row_to_task(row, username_password):
+    '''
+    Check a row and convert it into a Task.
+    Raises ValueError describing the first problem found.
+    '''
+    if not isinstance(row, dict):
+        raise ValueError(f"not a JSON object ({row})")
+    for column in ("username", "title", "description", "due_date"):
+        if not row.get(column):
+            raise ValueError(f"missing {column}")
+
+    username = str(row["username"])
+    title = str(row["title"])
+    description = str(row["description"])
+    if not is_safe_string(username):
+        raise ValueError("username cannot contain ';', ', ' or a line break")
+    if username not in username_password:
+        raise ValueError(f"user '{username}' does not exist")
+    for column, text in (("title", title), ("description", description)):
+        if not is_safe_string(text):
+            raise ValueError(f"{column} cannot contain ';', ', ' or a line break")
+
+    try:
+        due_date = datetime.fromordinal(parse_day(str(row["due_date"])))
+        if row.get("assigned_date"):
+            assigned_date = datetime.fromordinal(parse_day(str(row["assigned_date"])))
+        else:
+            assigned_date = datetime.fromordinal(date.today().toordinal())
+    except ValueError:
+        raise ValueError("dates must be in the format DD MMM YYYY (e.g. 18 Jun 2019)")
+
+    return Task(username, title, description, due_date, assigned_date,
+                parse_completed(row.get("completed", "No")))
+
+def task_to_values(task):
+    '''
+    Convert a task into a list of values in the order of COLUMNS
+    '''
+    return [task.username, task.title, task.description,
+            task.due_date.strftime(DATETIME_STRING_FORMAT),
+            task.assigned_date.strftime(DATETIME_STRING_FORMAT),
+            "Yes" if task.completed else "No"]
+
+### -------------------- IMPORT & EXPORT
+def import_tasks(path, storage, username_password, skip_invalid = False):
+    '''
+    Import every task in a CSV or JSON Lines file.
+
+    Inputs:
+    path: String - path to the file
+    storage: TextStorage or SQLiteStorage to add the tasks to
+    username_password: dictionary of username-password key-value pairs
+    skip_invalid: Boolean - store the valid rows even if some rows are invalid
+
+    Returns (number of tasks imported, list of (line number, error message)).
+    Unless 'skip_invalid' is True, nothing is imported if any row is invalid.
+    '''
+    format = file_format(path)
+    new_tasks = []
+    errors = []
+    with open(path, "r", newline="") as in_file:
+        for batch in read_batches(read_rows(in_file, format)):
+            for line_number, row in batch:
+                try:
+                    new_tasks.append(row_to_task(row, username_password))
+                except ValueError as error:
+                    errors.append((line_number, str(error)))
+
+    if errors and not skip_invalid:
+        return 0, errors
+    storage.add_tasks(new_tasks)
+    return len(new_tasks), errors
+
+def export_tasks(path, storage):
+    '''
+    Write every task to a CSV or JSON Lines file, one task at a time.
+
+    Returns the number of tasks written.
+    '''
+    format = file_format(path)
+    num_tasks = 0
+    with open(path, "w", newline="") as out_file:
+        if format == "csv":
+            writer = csv.writer(out_file)
+            writer.writerow(COLUMNS)
+        for _, task in storage.iter_tasks():
+            values = task_to_values(task)
+            if format == "csv":
+                writer.writerow(values)
+            else:
+                out_file.write(json.dumps(dict(zip(COLUMNS, values))) + "\n")
+            num_tasks += 1
+    return num_tasks
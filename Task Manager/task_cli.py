@@ -0,0 +1,231 @@
+### -------------------- PROGRAM EXPLANATION
+# Command line interface for scripts and scheduled jobs.
+# Unlike task_manager.py there is no login prompt or menu: each command does
+# one thing and exits. Tasks are read lazily (see task_lazy.py), so a command
+# only reads the tasks it actually needs.
+#
+# Usage:
+#   python task_cli.py add --user USER --title TITLE --description TEXT --due "18 Jun 2019"
+#   python task_cli.py list [--user USER] [--completed | --incomplete] [--overdue]
+#                           [--due-from DATE] [--due-to DATE] [--sort KEY]
+#                           [--page-size N] [--page N]
+#   python task_cli.py complete TASK_NUMBER
+#   python task_cli.py report [--force]
+#   python task_cli.py import FILE.csv|FILE.jsonl [--skip-invalid]
+#   python task_cli.py export FILE.csv|FILE.jsonl
+#   python task_cli.py register FILE.csv|FILE.jsonl [--skip-invalid]
+# Add '--sqlite' before the command to use tasks.db instead of tasks.txt, and
+# '--profile' to print how long loading, the command and each file read or
+# write took (see task_profiler.py).
+
+
+# Importing required modules
+import argparse
+import sys
+from datetime import datetime, date
+from itertools import islice
+from task_core import Task, DATETIME_STRING_FORMAT, open_storage, validate_string
+from report_cache import get_reports
+from user_registry import UserRegistry, import_users
+import task_profiler
+from task_bulk import import_tasks, export_tasks
+from task_listing import (SORT_KEYS, DEFAULT_PAGE_SIZE, select_tasks, paginate,
+                          render_page, write_pages)
+
+### -------------------- COMMANDS
+# Each command returns the exit status of the program (0 means success).
+def add_command(storage, args):
+    '''
+    Add a task, checking the same things as 'a' in task_manager.py
+    '''
+    if args.user not in storage.load_users():
+        print("User does not exist. Please enter a valid username")
+        return 1
+    if not validate_string(args.title) or not validate_string(args.description):
+        return 1
+    try:
+        due_date = datetime.strptime(args.due, DATETIME_STRING_FORMAT)
+    except ValueError:
+        print("Invalid datetime format. Please use the format DD MMM YYYY (e.g. 18 Jun 2019)")
+        return 1
+
+    storage.add_task(Task(args.user, args.title, args.description, due_date, date.today(), False))
+    print(f"Task {storage.task_count()} successfully added.")
+    return 0
+
+def list_command(storage, args):
+    '''
+    Print the tasks that match the filters, optionally only one page of them
+    '''
+    try:
+        due_from = datetime.strptime(args.due_from, DATETIME_STRING_FORMAT) if args.due_from else None
+        due_to = datetime.strptime(args.due_to, DATETIME_STRING_FORMAT) if args.due_to else None
+    except ValueError:
+        print("Invalid datetime format. Please use the format DD MMM YYYY (e.g. 18 Jun 2019)")
+        return 1
+
+    tasks = select_tasks(storage, username=args.user, completed=args.completed,
+                         overdue=args.overdue, due_from=due_from, due_to=due_to,
+                         sort_by=args.sort)
+    if args.page is not None:
+        pages = paginate(tasks, args.page_size)
+        page = next(islice(pages, args.page - 1, None), [])
+        sys.stdout.write(render_page(page))
+    else:
+        write_pages(tasks, args.page_size)
+    return 0
+
+def complete_command(storage, args):
+    '''
+    Mark a task as complete
+    '''
+    if not 1 <= args.task_number <= storage.task_count():
+        print(f"There is no task {args.task_number}.")
+        return 1
+    storage.complete_task(args.task_number - 1)
+    print(f"Task {args.task_number} marked as complete.")
+    return 0
+
+def report_command(storage, args):
+    '''
+    Write task_overview.txt and user_overview.txt, unless nothing has changed
+    since they were last written (or --force is given)
+    '''
+    _, regenerated = get_reports(storage, storage.load_users(), force=args.force)
+    if regenerated:
+        print("Reports written to task_overview.txt and user_overview.txt.")
+    else:
+        print("Reports are already up to date.")
+    return 0
+
+def import_command(storage, args):
+    '''
+    Import tasks from a CSV or JSON Lines file (see task_bulk.py)
+    '''
+    try:
+        num_tasks, errors = import_tasks(args.file, storage, storage.load_users(), args.skip_invalid)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 1
+
+    for line_number, error in errors:
+        print(f"Line {line_number}: {error}")
+    if errors and not args.skip_invalid:
+        print(f"{len(errors)} invalid rows - no tasks imported. Use --skip-invalid to import the valid rows.")
+        return 1
+    print(f"{num_tasks} tasks imported.")
+    return 0
+
+def export_command(storage, args):
+    '''
+    Export every task to a CSV or JSON Lines file (see task_bulk.py)
+    '''
+    try:
+        num_tasks = export_tasks(args.file, storage)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 1
+    print(f"{num_tasks} tasks exported to {args.file}.")
+    return 0
+
+def register_command(storage, args):
+    '''
+    Register many users from a CSV or JSON Lines file with the columns
+    username and password (see user_registry.py)
+    '''
+    try:
+        num_users, errors = import_users(args.file, UserRegistry(storage), args.skip_invalid)
+    except (OSError, ValueError) as error:
+        print(f"ERROR: {error}")
+        return 1
+
+    for line_number, error in errors:
+        print(f"Line {line_number}: {error}")
+    if errors and not args.skip_invalid:
+        print(f"{len(errors)} invalid rows - no users registered. Use --skip-invalid to register the valid rows.")
+        return 1
+    print(f"{num_users} users registered.")
+    return 0
+
+### -------------------- ARGUMENTS
+def positive_int(text):
+    '''
+    argparse type for whole numbers of 1 or more, e.g. page numbers and sizes
+    '''
+    try:
+        number = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{text}' is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage tasks without the interactive menu.")
+    parser.add_argument("--sqlite", action="store_true", help="use tasks.db instead of tasks.txt and user.txt")
+    parser.add_argument("--profile", action="store_true", help="print where the time went on exit")
+    parser.add_argument("--profile-stats", metavar="FILE", help="also save cProfile results to FILE")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = commands.add_parser("add", help="add a new task")
+    add_parser.add_argument("--user", required=True, help="username of the person assigned to the task")
+    add_parser.add_argument("--title", required=True)
+    add_parser.add_argument("--description", required=True)
+    add_parser.add_argument("--due", required=True, help="due date, e.g. '18 Jun 2019'")
+    add_parser.set_defaults(run=add_command)
+
+    list_parser = commands.add_parser("list", help="list tasks")
+    list_parser.add_argument("--user", help="only list tasks assigned to this user")
+    completion = list_parser.add_mutually_exclusive_group()
+    completion.add_argument("--completed", action="store_true", default=None,
+                            help="only list completed tasks")
+    completion.add_argument("--incomplete", dest="completed", action="store_false",
+                            help="only list incomplete tasks")
+    list_parser.add_argument("--overdue", action="store_true", help="only list overdue tasks")
+    list_parser.add_argument("--due-from", help="only list tasks due on or after this date")
+    list_parser.add_argument("--due-to", help="only list tasks due on or before this date")
+    list_parser.add_argument("--sort", choices=list(SORT_KEYS), default="number")
+    list_parser.add_argument("--page-size", type=positive_int, default=DEFAULT_PAGE_SIZE)
+    list_parser.add_argument("--page", type=positive_int, help="only print this page (starting from 1)")
+    list_parser.set_defaults(run=list_command)
+
+    complete_parser = commands.add_parser("complete", help="mark a task as complete")
+    complete_parser.add_argument("task_number", type=int)
+    complete_parser.set_defaults(run=complete_command)
+
+    report_parser = commands.add_parser("report", help="generate task_overview.txt and user_overview.txt")
+    report_parser.add_argument("--force", action="store_true",
+                               help="generate the reports even if nothing has changed")
+    report_parser.set_defaults(run=report_command)
+
+    import_parser = commands.add_parser("import", help="import tasks from a .csv or .jsonl file")
+    import_parser.add_argument("file")
+    import_parser.add_argument("--skip-invalid", action="store_true",
+                               help="import the valid rows even if some rows are invalid")
+    import_parser.set_defaults(run=import_command)
+
+    export_parser = commands.add_parser("export", help="export every task to a .csv or .jsonl file")
+    export_parser.add_argument("file")
+    export_parser.set_defaults(run=export_command)
+
+    register_parser = commands.add_parser("register", help="register users from a .csv or .jsonl file")
+    register_parser.add_argument("file")
+    register_parser.add_argument("--skip-invalid", action="store_true",
+                                 help="register the valid rows even if some rows are invalid")
+    register_parser.set_defaults(run=register_command)
+    return parser
+
+def main(argv = None):
+    args = build_parser().parse_args(argv)
+    profile_args = (["--profile"] if args.profile else []) + \
+                   ([f"--profile-stats={args.profile_stats}"] if args.profile_stats else [])
+    task_profiler.start(profile_args)
+    storage = open_storage(["--sqlite"] if args.sqlite else [], lazy=True)
+    try:
+        with task_profiler.timed(f"command {args.command}"):
+            return args.run(storage, args)
+    finally:
+        storage.close()
+
+if __name__ == "__main__":
+    sys.exit(main())
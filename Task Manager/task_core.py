@@ -0,0 +1,153 @@
+### -------------------- PROGRAM EXPLANATION
+# This module holds the parts of the task manager that other programs can use
+# without starting the interactive menu:
+# - Opening the task and user storage.
+# - Validating strings, usernames and passwords before they are stored.
+# - Generating the reports.
+# Importing this module does not read any files or ask for any input.
+# task_manager.py (interactive menu) and task_cli.py (commands for scripts)
+# are both built on top of it.
+
+
+# Importing required modules
+import os
+from task_table import Task, DATETIME_STRING_FORMAT
+from task_storage import TextStorage, SQLiteStorage
+
+### -------------------- OPENING STORAGE
+def open_storage(args = (), lazy = False):
+    '''
+    Open the storage backend chosen on the command line:
+    - '--sqlite': the SQLite database 'tasks.db'.
+    - '--lazy' (or the environment variable TASK_MANAGER_LAZY=1): tasks.txt
+      and user.txt, with tasks.txt memory-mapped and read when needed.
+    - Otherwise: tasks.txt and user.txt, read in full.
+
+    Inputs:
+    args: list of command line arguments
+    lazy: Boolean - use lazy mode even if '--lazy' is not given
+    '''
+    if "--sqlite" in args:
+        return SQLiteStorage("tasks.db")
+    lazy = lazy or "--lazy" in args or os.environ.get("TASK_MANAGER_LAZY") == "1"
+    return TextStorage("tasks.txt", "user.txt", lazy=lazy)
+
+### -------------------- DATA VALIDATION & STORING
+def is_safe_string(input_str):
+    '''
+    Check that a string can be stored without breaking user.txt (';') or
+    tasks.txt (', ' separates the fields of a task). Line breaks would split
+    a task (or a journal record) over two lines, so they are not allowed
+    either.
+    '''
+    return (";" not in input_str and ", " not in input_str
+            and "\n" not in input_str and "\r" not in input_str)
+
+def validate_string(input_str):
+    '''
+    Function for ensuring that string is safe to store
+    '''
+    if not is_safe_string(input_str):
+        print("Your input cannot contain a ';' character, ', ' or a line break")
+        return False
+    return True
+
+def check_username_and_password(username, password):
+    '''
+    Ensures that usernames and passwords can't break the system
+    '''
+    if not is_safe_string(username):
+        print("Username cannot contain ';', ', ' or a line break.")
+        return False
+    # ';' separates the username and password in user.txt.
+    if ";" in password or "\n" in password or "\r" in password:
+        print("Password cannot contain ';' or a line break.")
+        return False
+    return True
+
+def percentage(part, whole):
+    '''
+    Percentage of 'part' out of 'whole', or 0 if 'whole' is 0
+    '''
+    if whole == 0:
+        return 0
+    return (part/whole)*100
+
+### -------------------- REPORTS
+def generate_reports(storage, username_password):
+    '''
+
+    Generate Reports:
+    This function allows the admin to generate reports containing information
+    related to system statistics. It generates 2 .txt files:
+    'task_overview.txt':
+    - Number of Completed Tasks.
+    - Number of Incomplete Tasks.
+    - Number of Overdue Tasks.
+    - Percentage of Incomplete Tasks.
+    - Percentage of Overdue Tasks.
+
+    'user_overview.txt':
+    - The total number of users.
+    - The total number of tasks.
+    And for each user:
+    - Number of Tasks assigned to them.
+    - Percentage of Total Number of Tasks assigned to them.
+    - Percentage of Tasks assigned to them that have been completed.
+    - Percentage of Tasks assigned to them that still need to be completed.
+    - Percentage of Tasks assigned to them that are still incomplete and overdue.
+
+    Inputs:
+    storage: TextStorage or SQLiteStorage holding the tasks
+    username_password: dictionary of username-password key-value pairs
+    '''
+
+    # The counts come from the storage backend, which keeps them up to date
+    # as tasks change (text files) or works them out with an indexed query
+    # (SQLite).
+    write_reports(storage.total_counts(), storage.user_counts, username_password)
+
+def write_reports(total_counts, user_counts, usernames, folder = "."):
+    '''
+    Write 'task_overview.txt' and 'user_overview.txt' from counts that have
+    already been worked out.
+
+    Inputs:
+    total_counts: (tasks, completed, incomplete, overdue) for every task
+    user_counts: function returning (tasks, completed, incomplete, overdue)
+                 for a username
+    usernames: the users to list in 'user_overview.txt'
+    folder: String - folder to write the reports to
+    '''
+    num_tasks, complete, incomplete, overdue = total_counts
+
+    # Write stats to 'task_overview.txt'.
+    with open(os.path.join(folder, 'task_overview.txt'),'w+') as task_report:
+        task_report.write(f"Total # of Tasks: \t\t {num_tasks}\n")
+        task_report.write(f"# of Completed Tasks: \t\t {complete} out of {num_tasks} tasks.\n")
+        task_report.write(f"# of Incomplete Tasks: \t\t {incomplete} out of {num_tasks} tasks.\n")
+        task_report.write(f"# of Overdue Tasks: \t\t {overdue} out of {num_tasks} tasks.\n")
+        task_report.write(f"% of Incomplete Tasks: \t\t {percentage(incomplete, num_tasks)}%\n")
+        task_report.write(f"% of Overdue Tasks: \t\t {percentage(overdue, num_tasks)}%")
+    
+    # Write stats to 'user_overview.txt'.
+    with open(os.path.join(folder, 'user_overview.txt'),'w+') as user_report:
+        user_report.write(f"Number of Users: {len(usernames)}\n")
+        user_report.write(f"Number of Tasks: {num_tasks}\n")
+        user_report.write(f"-----------------------------------\n")
+        
+        # Obtaining stats for each user in system.
+        for user in usernames:
+            user_tasks, user_completed, user_incomplete, user_overdue = user_counts(user)
+
+            user_report.write(f"{user} has {user_tasks} tasks.\n")
+            user_report.write(f"{user} is assigned {percentage(user_tasks, num_tasks)}% of the tasks.\n")
+            if user_tasks > 0:
+                user_report.write(f"{user} has completed {percentage(user_completed, user_tasks)}% of their assigned tasks.\n")
+                user_report.write(f"{user} has {percentage(user_incomplete, user_tasks)}% of their assigned tasks left to complete.\n")
+                user_report.write(f"{user} has {percentage(user_overdue, user_incomplete)}% of their incomplete tasks overdue.\n")
+            else:
+                user_report.write(f"{user} has 0 tasks assigned - cannot compute percentage of task completion.\n")
+                user_report.write(f"{user} has 0 tasks assigned - cannot compute percentage of tasks still incomplete.\n")
+                user_report.write(f"{user} has 0 tasks assigned - cannot compute percentage of incomplete tasks that are overdue.\n")
+            user_report.write(f"-----------------------------------\n")
@@ -0,0 +1,86 @@
+### -------------------- PROGRAM EXPLANATION
+# Synthetic data generator for trying out and benchmarking the task manager.
+# Writes a user.txt with N users and a tasks.txt with M tasks in the usual
+# ", " line format, with a realistic spread:
+# - a few users have many tasks and most have only a few,
+# - tasks were assigned over the last two years and are due 1 to 60 days
+#   after being assigned, so some are overdue and some are still to come,
+# - older tasks are more likely to be completed.
+# The same seed always gives the same files.
+#
+# Usage: python task_generator.py NUM_USERS NUM_TASKS [FOLDER] [--seed N]
+
+
+# Importing required modules
+import argparse
+import os
+import random
+from datetime import date, timedelta
+from itertools import accumulate
+from task_table import DATETIME_STRING_FORMAT
+
+# Days over which tasks were assigned, counting back from today.
+ASSIGNED_DAYS = 730
+MAX_DAYS_TO_DUE = 60
+
+TITLES = ["Write report", "Review code", "Plan meeting", "Update website",
+          "Fix bug", "Call client", "Prepare invoice", "Test release"]
+
+def generate_users(num_users):
+    '''
+    Returns a dictionary of username-password pairs, starting with admin
+    '''
+    users = {"admin": "adm1n"}
+    for number in range(1, num_users):
+        users[f"user{number}"] = f"password{number}"
+    return users
+
+def generate_task_lines(usernames, num_tasks, seed = 0):
+    '''
+    Yields 'num_tasks' lines in the tasks.txt format
+    '''
+    randomiser = random.Random(seed)
+    # Users further down the list get fewer tasks (weights 1, 1/2, 1/3, ...).
+    cumulative_weights = list(accumulate(1 / (rank + 1) for rank in range(len(usernames))))
+    today = date.today()
+    # The same dates come up again and again, so they are only formatted once.
+    day_strings = [(today - timedelta(days=days)).strftime(DATETIME_STRING_FORMAT)
+                   for days in range(-MAX_DAYS_TO_DUE, ASSIGNED_DAYS + 1)]
+
+    for number in range(num_tasks):
+        username = randomiser.choices(usernames, cum_weights=cumulative_weights)[0]
+        assigned_ago = randomiser.randint(0, ASSIGNED_DAYS)
+        due_ago = assigned_ago - randomiser.randint(1, MAX_DAYS_TO_DUE)
+        completed = randomiser.random() < assigned_ago / ASSIGNED_DAYS
+        title = f"{TITLES[number % len(TITLES)]} {number + 1}"
+        yield (f"{username}, {title}, Synthetic task number {number + 1}, "
+               f"{day_strings[due_ago + MAX_DAYS_TO_DUE]}, "
+               f"{day_strings[assigned_ago + MAX_DAYS_TO_DUE]}, "
+               f"{'Yes' if completed else 'No'}")
+
+def write_data(folder, num_users, num_tasks, seed = 0):
+    '''
+    Write user.txt and tasks.txt into 'folder', replacing any journal, index
+    or report files left from before
+    '''
+    users = generate_users(num_users)
+    with open(os.path.join(folder, "user.txt"), "w") as user_file:
+        user_file.write("\n".join([f"{k};{users[k]}" for k in users]))
+    with open(os.path.join(folder, "tasks.txt"), "w") as task_file:
+        for line in generate_task_lines(list(users), num_tasks, seed):
+            task_file.write(line + "\n")
+    for name in ("tasks.journal", "tasks.txt.idx", "report_stamp.txt"):
+        path = os.path.join(folder, name)
+        if os.path.exists(path):
+            os.remove(path)
+    return users
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write made-up users and tasks for testing.")
+    parser.add_argument("num_users", type=int)
+    parser.add_argument("num_tasks", type=int)
+    parser.add_argument("folder", nargs="?", default=".")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    write_data(args.folder, args.num_users, args.num_tasks, args.seed)
+    print(f"Wrote {args.num_users} users and {args.num_tasks} tasks to {args.folder}.")
@@ -0,0 +1,114 @@
+### -------------------- PROGRAM EXPLANATION
+# This module keeps two indexes over the list of tasks so that common lookups
+# don't need to look at every task:
+# - For each username, the positions of the tasks assigned to that user.
+# - The due dates of all incomplete tasks, kept in sorted order.
+# Positions are indexes into 'task_list' (task number - 1). Looking up the
+# tasks for a user, the overdue tasks or the tasks due in the next N days
+# takes O(log n + k) time, where k is the number of tasks returned.
+
+
+# Importing required modules
+from bisect import bisect_left, bisect_right, insort
+from datetime import date, timedelta
+from task_table import scan_tasks
+
+### -------------------- DEFINING INDEX CLASS
+class TaskIndex:
+    def __init__(self, task_list = None, lazy = False):
+        '''
+        Inputs:
+        task_list: List of Task objects to index
+        lazy: If True, the indexes are only built the first time they are
+              needed
+        '''
+        self.task_list = [] if task_list is None else task_list
+        self.built = False
+        if not lazy:
+            self.rebuild(self.task_list)
+
+    def build_if_needed(self):
+        if not self.built:
+            self.rebuild(self.task_list)
+
+    def rebuild(self, task_list):
+        '''
+        Build both indexes from scratch
+        '''
+        self.task_list = task_list
+        self.built = True
+        # username -> sorted list of task positions
+        self.by_user = {}
+        # sorted list of (due date ordinal, task position) for incomplete tasks
+        self.by_due_date = []
+        for position, username, completed, due_day in scan_tasks(task_list):
+            self.by_user.setdefault(username, []).append(position)
+            if not completed:
+                self.by_due_date.append((due_day, position))
+        self.by_due_date.sort()
+
+    def add(self, position, task):
+        '''
+        Add a task to the indexes.
+        Call this after changing a task and remove() before.
+        '''
+        # Indexes that have not been built yet will include the task when they are.
+        if not self.built:
+            return
+        user_positions = self.by_user.setdefault(task.username, [])
+        # New tasks are always added to the end of 'task_list', so appending
+        # keeps the list sorted without searching.
+        if not user_positions or user_positions[-1] < position:
+            user_positions.append(position)
+        else:
+            insort(user_positions, position)
+
+        if not task.completed:
+            insort(self.by_due_date, (task.due_date.toordinal(), position))
+
+    def remove(self, position, task):
+        '''
+        Remove a task from the indexes
+        '''
+        if not self.built:
+            return
+        user_positions = self.by_user[task.username]
+        del user_positions[bisect_left(user_positions, position)]
+
+        if not task.completed:
+            entry = (task.due_date.toordinal(), position)
+            del self.by_due_date[bisect_left(self.by_due_date, entry)]
+
+    def tasks_for(self, username):
+        '''
+        Returns the positions of the tasks assigned to a user, in order
+        '''
+        self.build_if_needed()
+        return self.by_user.get(username, [])
+
+    def due_between(self, first_day, last_day):
+        '''
+        Returns the positions of incomplete tasks due between two dates
+        (inclusive), ordered by due date
+        '''
+        self.build_if_needed()
+        start = bisect_left(self.by_due_date, (first_day.toordinal(),))
+        end = bisect_right(self.by_due_date, (last_day.toordinal(), float("inf")))
+        return [position for _, position in self.by_due_date[start:end]]
+
+    def overdue(self, today = None):
+        '''
+        Returns the positions of incomplete tasks that are overdue.
+        As in the reports, a task due today counts as overdue.
+        '''
+        self.build_if_needed()
+        today = today or date.today()
+        end = bisect_right(self.by_due_date, (today.toordinal(), float("inf")))
+        return [position for _, position in self.by_due_date[:end]]
+
+    def due_within(self, days, today = None):
+        '''
+        Returns the positions of incomplete tasks due in the next 'days' days
+        '''
+        today = today or date.today()
+        return self.due_between(today + timedelta(days=1), today + timedelta(days=days))
@@ -0,0 +1,280 @@
+### -------------------- PROGRAM EXPLANATION
+# This module stores changes to the tasks in an append-only journal.
+# Rewriting the whole of 'tasks.txt' every time a task is added or edited
+# becomes very slow once there are thousands of tasks, so instead each change
+# is appended as a single line to 'tasks.journal'.
+# When the program starts, 'tasks.txt' (the snapshot) is read and the journal
+# is replayed over it. Once the journal grows large enough it is compacted:
+# the snapshot is rewritten once and the journal is emptied.
+
+
+# Importing required modules
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from task_table import DATETIME_STRING_FORMAT
+from task_loader import load_tasks, parse_fields, parse_day
+
+# The journal is compacted once it holds at least this many records, or as
+# many records as there are tasks (whichever is larger). Tying the threshold
+# to the number of tasks keeps the cost of compaction at O(1) per change on
+# average.
+MIN_COMPACT_THRESHOLD = 500
+
+# Names of the records that can appear in the journal.
+ADD = "add"
+COMPLETE = "complete"
+REASSIGN = "reassign"
+REDATE = "redate"
+
+# The field of a task each kind of edit record changes.
+RECORD_FIELDS = {COMPLETE: "completed", REASSIGN: "username", REDATE: "due_date"}
+
+### -------------------- DEFINING JOURNAL CLASS
+# Each line of the journal has the form '<record>, <fields...>' using the same
+# ", " separator as tasks.txt:
+#   add, <task number>, <task in tasks.txt format>
+#   complete, <task number>
+#   reassign, <task number>, <username>
+#   redate, <task number>, <due date>
+# Task numbers start from 1, just like the numbers shown in 'view_all'.
+# Every record can safely be replayed twice: if the program stops between
+# rewriting the snapshot and emptying the journal, 'add' records for tasks
+# already in the snapshot are skipped and the edits simply set the same value
+# again.
+class TaskJournal:
+    def __init__(self, snapshot_path = "tasks.txt", journal_path = "tasks.journal"):
+        '''
+        Inputs:
+        snapshot_path: String - path to the tasks.txt snapshot
+        journal_path: String - path to the append-only journal
+        '''
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.num_records = 0
+        # Records made inside batch(), waiting to be written.
+        self.pending = None
+        self.snapshot_seen = None
+        self.offset = 0
+
+    def load(self, task_list):
+        '''
+        Read the snapshot and replay the journal over it.
+
+        Inputs:
+        task_list: an empty TaskTable to load the tasks into
+
+        Returns the TaskTable.
+        '''
+        if not os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "w") as default_file:
+                pass
+
+        with open(self.snapshot_path, "r") as task_file:
+            errors = load_tasks(task_file, task_list)
+        for line_number, error in errors:
+            print(f"Skipping line {line_number} of {self.snapshot_path}: {error}")
+
+        return self.replay(task_list)
+
+    def replay(self, task_list):
+        '''
+        Replay the journal over tasks that have already been read from the
+        snapshot (e.g. a LazyTaskFile).
+
+        Returns the list of tasks.
+        '''
+        self.num_records = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r") as journal_file:
+                for record in journal_file:
+                    record = record.rstrip("\n")
+                    if record == "":
+                        continue
+                    try:
+                        self._replay(record, task_list)
+                    except (ValueError, IndexError):
+                        # A half-written last line (e.g. after a crash) is
+                        # ignored rather than stopping the program.
+                        print(f"Skipping unreadable journal record: {record}")
+                        continue
+                    self.num_records += 1
+        self.mark_read()
+        return task_list
+
+    def _replay(self, record, task_list):
+        '''
+        Apply a single journal record to the list of tasks
+        '''
+        name, position, value = parse_record(record)
+        if name == ADD:
+            if position >= len(task_list):
+                task_list.append_fields(*value)
+            return
+        setattr(task_list[position], RECORD_FIELDS[name], value)
+
+    ### ---------- Changes made by other programs
+    def snapshot_stamp(self):
+        '''
+        Returns the size and modification time of the snapshot, which change
+        whenever it is rewritten
+        '''
+        if not os.path.exists(self.snapshot_path):
+            return None
+        file_stat = os.stat(self.snapshot_path)
+        return (file_stat.st_size, file_stat.st_mtime_ns)
+
+    def mark_read(self):
+        '''
+        Remember how much of the snapshot and journal has been read, so that
+        new_records() can tell what other programs have added since
+        '''
+        self.snapshot_seen = self.snapshot_stamp()
+        self.offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+
+    def new_records(self):
+        '''
+        Returns the records other programs have appended to the journal since
+        it was last read or written by this one.
+        Returns None if another program has rewritten the snapshot (compacted
+        the journal), in which case everything has to be read again.
+        '''
+        if self.snapshot_stamp() != self.snapshot_seen:
+            return None
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        if size < self.offset:
+            return None
+        if size == self.offset:
+            return []
+
+        with open(self.journal_path, "rb") as journal_file:
+            journal_file.seek(self.offset)
+            data = journal_file.read(size - self.offset)
+        self.offset = size
+        records = [record.rstrip("\r") for record in data.decode().split("\n")]
+        records = [record for record in records if record != ""]
+        self.num_records += len(records)
+        return records
+
+    ### ---------- Writing records
+    def _append(self, *fields):
+        '''
+        Append one record to the journal
+        '''
+        self._write(", ".join(fields) + "\n", 1)
+
+    def _write(self, text, num_records):
+        '''
+        Append text holding 'num_records' records to the journal, or keep it
+        until the end of the batch if one has been started (see batch())
+        '''
+        if self.pending is not None:
+            self.pending.append(text)
+        else:
+            with open(self.journal_path, "a") as journal_file:
+                journal_file.write(text)
+                self.offset = journal_file.tell()
+        self.num_records += num_records
+
+    @contextmanager
+    def batch(self):
+        '''
+        Keep every record made inside 'with journal.batch():' and append them
+        all with a single write at the end (a group commit)
+        '''
+        if self.pending is not None:
+            # Already inside a batch - the outer batch writes the records.
+            yield
+            return
+        self.pending = []
+        try:
+            yield
+        finally:
+            pending, self.pending = self.pending, None
+            if pending:
+                with open(self.journal_path, "a") as journal_file:
+                    journal_file.write("".join(pending))
+                    self.offset = journal_file.tell()
+
+    def record_add(self, task_num, task):
+        self._append(ADD, str(task_num), task.to_string())
+
+    def record_adds(self, first_task_num, tasks):
+        '''
+        Append an 'add' record for each of a list of new tasks with a single
+        write
+        '''
+        self._write("".join([f"{ADD}, {task_num}, {task.to_string()}\n"
+                             for task_num, task in enumerate(tasks, first_task_num)]), len(tasks))
+
+    def record_complete(self, task_num):
+        self._append(COMPLETE, str(task_num))
+
+    def record_reassign(self, task_num, username):
+        self._append(REASSIGN, str(task_num), username)
+
+    def record_redate(self, task_num, due_date):
+        self._append(REDATE, str(task_num), due_date.strftime(DATETIME_STRING_FORMAT))
+
+    def needs_compaction(self, num_tasks):
+        '''
+        Check whether the journal has grown enough to be worth compacting
+        '''
+        return self.num_records >= max(MIN_COMPACT_THRESHOLD, num_tasks)
+
+    def compact(self, task_list):
+        '''
+        Rewrite the snapshot from the current list of tasks and empty the
+        journal.
+        The new snapshot is written to a temporary file first and then moved
+        into place, so tasks.txt is never left half-written.
+        '''
+        temp_path = self.snapshot_path + ".tmp"
+        with open(temp_path, "w") as task_file:
+            task_file.write("\n".join([t.to_string() for t in task_list]))
+
+        # A LazyTaskFile has the old snapshot memory-mapped, so it is released
+        # before the file is replaced and re-opened afterwards.
+        lazy = hasattr(task_list, "open_snapshot")
+        if lazy:
+            task_list.close_snapshot()
+        os.replace(temp_path, self.snapshot_path)
+        if lazy:
+            task_list.open_snapshot()
+
+        with open(self.journal_path, "w") as journal_file:
+            pass
+        self.num_records = 0
+        self.mark_read()
+
+def parse_position(task_num):
+    '''
+    Convert a task number from a journal record into a task position.
+    Task numbers start at 1, and a position below 0 would count back from
+    the last task, so those are rejected.
+    '''
+    position = int(task_num) - 1
+    if position < 0:
+        raise ValueError(f"invalid task number {task_num}")
+    return position
+
+def parse_record(record):
+    '''
+    Split a journal record into (name, task position, value). The value is
+    the fields of the new task for 'add' records (see parse_fields()) and the
+    new value of the field for edits.
+    '''
+    name, fields = record.split(", ", 1)
+    if name == ADD:
+        task_num, task_str = fields.split(", ", 1)
+        return name, parse_position(task_num), parse_fields(task_str)
+
+    fields = fields.split(", ")
+    position = parse_position(fields[0])
+    if name == COMPLETE:
+        return name, position, True
+    elif name == REASSIGN:
+        return name, position, fields[1]
+    elif name == REDATE:
+        return name, position, datetime.fromordinal(parse_day(fields[1]))
+    raise ValueError(f"Unknown journal record '{name}'")
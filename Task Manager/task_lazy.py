@@ -0,0 +1,219 @@
+### -------------------- PROGRAM EXPLANATION
+# This module provides a lazy way of reading tasks.txt for very large files.
+# Instead of reading every task when the program starts, tasks.txt is
+# memory-mapped and a small index of where each line starts is kept in a
+# sidecar file ('tasks.txt.idx'). A task is only parsed when it is actually
+# needed, e.g. when 'va' or 'vm' reaches it.
+# The sidecar index is only rebuilt when the size or modification time of
+# tasks.txt changes, so starting the program takes about the same time however
+# many tasks there are.
+#
+# Lazy mode is switched on by running 'python task_manager.py --lazy' or by
+# setting the environment variable TASK_MANAGER_LAZY=1.
+
+
+# Importing required modules
+import mmap
+import os
+import struct
+from array import array
+from datetime import datetime
+from task_table import Task
+from task_loader import parse_fields, parse_day
+
+# The sidecar index starts with a format marker and the size and
+# modification time (in nanoseconds) of tasks.txt when it was built, followed
+# by the offset of the start of every task.
+# The marker changes whenever the index is built differently, so indexes
+# written by older versions are rebuilt.
+INDEX_MARKER = b"TIX2"
+INDEX_HEADER = struct.Struct("<4sQQ")
+
+### -------------------- BUILDING THE LINE INDEX
+def build_offsets(data, errors = None):
+    '''
+    Returns an array with the offset of the start of every task in 'data' (a
+    memory map or bytes).
+    Lines that cannot be read are skipped, exactly as task_loader.load_tasks()
+    skips them, so tasks have the same numbers in lazy and full mode (the
+    journal relies on this). (line number, error message) is added to the
+    list 'errors' for each of them.
+    '''
+    offsets = array("Q")
+    start = 0
+    size = len(data)
+    line_number = 0
+    while start < size:
+        line_number += 1
+        end = data.find(b"\n", start)
+        if end == -1:
+            end = size
+        line = data[start:end].rstrip(b"\r")
+        if line != b"":
+            try:
+                parse_fields(line.decode())
+                offsets.append(start)
+            except ValueError as error:
+                if errors is not None:
+                    errors.append((line_number, str(error)))
+        start = end + 1
+    return offsets
+
+def load_offsets(index_path, file_stat):
+    '''
+    Read the sidecar index, or return None if it is missing or out of date
+    '''
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, "rb") as index_file:
+        header = index_file.read(INDEX_HEADER.size)
+        if len(header) != INDEX_HEADER.size:
+            return None
+        if INDEX_HEADER.unpack(header) != (INDEX_MARKER, file_stat.st_size, file_stat.st_mtime_ns):
+            return None
+        offsets = array("Q")
+        data = index_file.read()
+        if len(data) % offsets.itemsize != 0:
+            return None
+        offsets.frombytes(data)
+    return offsets
+
+def save_offsets(index_path, file_stat, offsets):
+    '''
+    Write the sidecar index, stamped with the size and mtime of tasks.txt.
+    The index is written to a temporary file first and then put in place, so
+    a crash or full disk can never leave a cut-short index that still looks
+    up to date.
+    '''
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "wb") as index_file:
+        index_file.write(INDEX_HEADER.pack(INDEX_MARKER, file_stat.st_size, file_stat.st_mtime_ns))
+        index_file.write(offsets.tobytes())
+    os.replace(temp_path, index_path)
+
+### -------------------- DEFINING LAZY TASK FILE CLASS
+# A LazyTaskFile can be used in the same way as a list of tasks.
+# - Tasks that have been looked up by number are kept in 'loaded', so changes
+#   made to them are not lost.
+# - Tasks added since the file was opened are kept in 'added'.
+# Everything else is parsed straight from the memory-mapped file each time.
+class LazyTaskFile:
+    def __init__(self, snapshot_path = "tasks.txt"):
+        '''
+        Inputs:
+        snapshot_path: String - path to tasks.txt
+        '''
+        self.snapshot_path = snapshot_path
+        self.index_path = snapshot_path + ".idx"
+        self.data = None
+        self.open_snapshot()
+
+    def open_snapshot(self):
+        '''
+        Memory-map tasks.txt and read (or rebuild) its line index
+        '''
+        if not os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "w") as default_file:
+                pass
+
+        self.loaded = {}
+        self.added = []
+        file_stat = os.stat(self.snapshot_path)
+        if file_stat.st_size == 0:
+            # An empty file cannot be memory-mapped.
+            self.data = b""
+        else:
+            with open(self.snapshot_path, "rb") as task_file:
+                self.data = mmap.mmap(task_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.offsets = load_offsets(self.index_path, file_stat)
+        if self.offsets is None:
+            # Skipped lines are reported when the index is built, as they are
+            # when tasks.txt is read in full.
+            errors = []
+            self.offsets = build_offsets(self.data, errors)
+            for line_number, error in errors:
+                print(f"Skipping line {line_number} of {self.snapshot_path}: {error}")
+            save_offsets(self.index_path, file_stat, self.offsets)
+
+    def close_snapshot(self):
+        '''
+        Release the memory map so tasks.txt can be replaced
+        '''
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self.data = None
+
+    def _line(self, position):
+        '''
+        Returns the text of a line of tasks.txt
+        '''
+        start = self.offsets[position]
+        end = self.data.find(b"\n", start)
+        if end == -1:
+            end = len(self.data)
+        return self.data[start:end].rstrip(b"\r").decode()
+
+    def _parse(self, position):
+        '''
+        Parse a line of tasks.txt into a Task
+        '''
+        try:
+            fields = parse_fields(self._line(position))
+        except ValueError as error:
+            raise ValueError(f"Task {position+1} in {self.snapshot_path} cannot be read: {error}")
+        return make_task(*fields)
+
+    def __len__(self):
+        return len(self.offsets) + len(self.added)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("task position out of range")
+        if position >= len(self.offsets):
+            return self.added[position - len(self.offsets)]
+        task = self.loaded.get(position)
+        if task is None:
+            task = self.loaded[position] = self._parse(position)
+        return task
+
+    def __iter__(self):
+        # Tasks are parsed one at a time and not kept, so looping over every
+        # task does not load the whole file into memory.
+        for position in range(len(self.offsets)):
+            task = self.loaded.get(position)
+            yield task if task is not None else self._parse(position)
+        yield from self.added
+
+    def append(self, task):
+        self.added.append(task)
+
+    def append_fields(self, username, title, description, due_day, assigned_day, completed):
+        self.added.append(make_task(username, title, description, due_day, assigned_day, completed))
+
+    def scan(self):
+        '''
+        Yields (position, username, completed, due date ordinal) for every
+        task. Lines that have not been loaded are split without creating a
+        Task.
+        '''
+        for position in range(len(self.offsets)):
+            task = self.loaded.get(position)
+            if task is not None:
+                yield position, task.username, bool(task.completed), task.due_date.toordinal()
+                continue
+            tasks = self._line(position).split(", ")
+            if len(tasks) != 6:
+                raise ValueError(f"Task {position+1} in {self.snapshot_path} cannot be read")
+            yield position, tasks[0], tasks[5] == "Yes", parse_day(tasks[3])
+        for position, task in enumerate(self.added, len(self.offsets)):
+            yield position, task.username, bool(task.completed), task.due_date.toordinal()
+
+def make_task(username, title, description, due_day, assigned_day, completed):
+    '''
+    Create a Task from fields with the dates given as date ordinals
+    '''
+    return Task(username, title, description, datetime.fromordinal(due_day),
+                datetime.fromordinal(assigned_day), completed)
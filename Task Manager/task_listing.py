@@ -0,0 +1,154 @@
+### -------------------- PROGRAM EXPLANATION
+# This module lists tasks a page at a time.
+# - select_tasks() picks out the tasks to show (by user, completion, overdue
+#   or due date range) and sorts them. It is a generator, so tasks are only
+#   read as they are needed, and it uses the storage indexes for the user and
+#   overdue filters instead of looking at every task.
+# - Each page is formatted with Task.display() and written to the screen with
+#   a single write, instead of two print() calls per task.
+# - Pages that have already been formatted are kept, so going back to a page
+#   does not format its tasks again.
+
+
+# Importing required modules
+import sys
+from itertools import islice
+
+SEPARATOR = "-----------------------------------"
+DEFAULT_PAGE_SIZE = 10
+
+# Sort keys that can be used with select_tasks(). Each key is given a
+# (position, task) pair; the position keeps the order stable.
+SORT_KEYS = {
+    "number": None,
+    "due": lambda item: (item[1].due_date, item[0]),
+    "assigned": lambda item: (item[1].assigned_date, item[0]),
+    "user": lambda item: (item[1].username, item[0]),
+    "title": lambda item: (item[1].title.lower(), item[0]),
+}
+
+### -------------------- SELECTING TASKS
+def select_tasks(storage, username = None, completed = None, overdue = False,
+                 due_from = None, due_to = None, sort_by = "number"):
+    '''
+    Yields (position, task) for the tasks that match every filter given.
+
+    Inputs:
+    storage: TextStorage or SQLiteStorage holding the tasks
+    username: only tasks assigned to this user
+    completed: True for completed tasks only, False for incomplete tasks only
+    overdue: only incomplete tasks that are overdue
+    due_from, due_to: only tasks due on or after / on or before these dates
+    sort_by: one of the names in SORT_KEYS ("number" keeps task order)
+    '''
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Cannot sort by '{sort_by}'. Choose from: {', '.join(SORT_KEYS)}")
+
+    # Start from the smallest set of tasks an index can give us.
+    if overdue:
+        positions = sorted(storage.overdue())
+    elif username is not None:
+        positions = storage.tasks_for(username)
+    else:
+        positions = None
+
+    if positions is None:
+        tasks = storage.iter_tasks()
+    else:
+        tasks = ((position, storage.get_task(position)) for position in positions)
+
+    due_from_day = due_from.toordinal() if due_from is not None else None
+    due_to_day = due_to.toordinal() if due_to is not None else None
+
+    def matches(task):
+        if username is not None and task.username != username:
+            return False
+        if completed is not None and bool(task.completed) != completed:
+            return False
+        if due_from_day is not None or due_to_day is not None:
+            due_day = task.due_date.toordinal()
+            if due_from_day is not None and due_day < due_from_day:
+                return False
+            if due_to_day is not None and due_day > due_to_day:
+                return False
+        return True
+
+    selected = ((position, task) for position, task in tasks if matches(task))
+    if SORT_KEYS[sort_by] is None:
+        yield from selected
+    else:
+        yield from sorted(selected, key=SORT_KEYS[sort_by])
+
+### -------------------- SHOWING PAGES
+def paginate(tasks, page_size = DEFAULT_PAGE_SIZE):
+    '''
+    Group (position, task) pairs into lists of up to 'page_size'
+    '''
+    tasks = iter(tasks)
+    while True:
+        page = list(islice(tasks, page_size))
+        if not page:
+            return
+        yield page
+
+def render_page(page):
+    '''
+    Format a page of tasks as a single string, laid out the same way as 'va'
+    '''
+    return "".join([f"{task.display(position+1)}\n{SEPARATOR}\n" for position, task in page])
+
+def write_pages(tasks, page_size = None, out = sys.stdout):
+    '''
+    Write every task to 'out', one page at a time without pausing.
+    Returns the number of tasks written.
+    '''
+    num_tasks = 0
+    for page in paginate(tasks, page_size or DEFAULT_PAGE_SIZE):
+        out.write(render_page(page))
+        num_tasks += len(page)
+    out.flush()
+    return num_tasks
+
+def show_pages(tasks, page_size = DEFAULT_PAGE_SIZE):
+    '''
+    Show tasks a page at a time, letting the user move forwards and back.
+    Returns False if there were no tasks to show.
+    '''
+    pages = paginate(tasks, page_size)
+    # Formatted pages are kept so moving back does not format them again.
+    rendered = []
+
+    def load(page_number):
+        '''
+        Format pages up to 'page_number'. Returns False if there is no such page.
+        '''
+        while len(rendered) <= page_number:
+            page = next(pages, None)
+            if page is None:
+                return False
+            rendered.append(render_page(page))
+        return True
+
+    if not load(0):
+        return False
+    current = 0
+    while True:
+        sys.stdout.write(rendered[current])
+        sys.stdout.flush()
+
+        has_next = load(current + 1)
+        if not has_next and current == 0:
+            return True
+        options = []
+        if has_next:
+            options.append("n - next page")
+        if current > 0:
+            options.append("p - previous page")
+        options.append("q - stop")
+        choice = input(f"Page {current+1}: {', '.join(options)}: ").lower()
+        if choice == "n" and has_next:
+            current += 1
+        elif choice == "p" and current > 0:
+            current -= 1
+        elif choice == "q":
+            return True
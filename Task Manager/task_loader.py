@@ -0,0 +1,61 @@
+### -------------------- PROGRAM EXPLANATION
+# This module reads lines of tasks.txt into a TaskTable as quickly as possible.
+# - Each line is split once and its fields are added straight to the table,
+#   without creating a Task object first.
+# - datetime.strptime() is slow, and the same few dates appear on thousands of
+#   lines, so each date string is only parsed the first time it is seen.
+# - Lines that cannot be read are reported with their line number and skipped
+#   instead of stopping the program.
+
+
+# Importing required modules
+from datetime import datetime
+from functools import lru_cache
+from task_table import DATETIME_STRING_FORMAT
+
+### -------------------- PARSING FUNCTIONS
+@lru_cache(maxsize=None)
+def parse_day(date_str):
+    '''
+    Convert a date in the format 'DD MMM YYYY' into a date ordinal.
+    Results are remembered, so repeated dates are only parsed once.
+    '''
+    return datetime.strptime(date_str, DATETIME_STRING_FORMAT).toordinal()
+
+def parse_fields(task_str):
+    '''
+    Split a line of tasks.txt into the fields used by TaskTable.append_fields():
+    (username, title, description, due date ordinal, assigned date ordinal,
+    completed)
+
+    Raises ValueError if the line is not in the expected format.
+    '''
+    tasks = task_str.split(", ")
+    if len(tasks) != 6:
+        raise ValueError(f"expected 6 fields separated by ', ' but found {len(tasks)}")
+    username, title, description, due_date, assigned_date, completed = tasks
+    return (username, title, description, parse_day(due_date),
+            parse_day(assigned_date), completed == "Yes")
+
+def load_tasks(lines, task_table):
+    '''
+    Add every line of tasks.txt to a TaskTable.
+
+    Inputs:
+    lines: the open tasks.txt file, or any other iterable of lines
+    task_table: TaskTable to add the tasks to
+
+    Returns a list of (line number, error message) for the lines that were
+    skipped.
+    '''
+    errors = []
+    append_fields = task_table.append_fields
+    for line_number, task_str in enumerate(lines, 1):
+        task_str = task_str.rstrip("\n")
+        if task_str == "":
+            continue
+        try:
+            append_fields(*parse_fields(task_str))
+        except ValueError as error:
+            errors.append((line_number, str(error)))
+    return errors
@@ -0,0 +1,213 @@
+### -------------------- PROGRAM EXPLANATION
+# Opt-in timing for finding out what makes the task manager slow.
+# Run 'python task_manager.py --profile' (or set TASK_MANAGER_PROFILE=1) and
+# when the program exits a summary is printed with the number of calls and
+# the total time spent in:
+# - loading the tasks (reading tasks.txt, replaying the journal),
+# - each menu option (reg_user, add_task, view_mine, display_stats, ...),
+# - generating reports and each change made to the storage,
+# - reading and writing each file, together with the bytes read and written.
+# Times include anything called inside, e.g. 'menu add_task' includes the
+# 'storage add_task' it calls.
+# Add '--profile-stats=FILE' (or set TASK_MANAGER_PROFILE_STATS=FILE) to also
+# run cProfile and save its results to FILE, which can be explored with
+# 'python -m pstats FILE'.
+#
+# Nothing is changed unless profiling is switched on, so it costs nothing
+# otherwise.
+
+
+# Importing required modules
+import atexit
+import cProfile
+import functools
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+# Name -> [number of calls, total seconds, bytes read or written]
+timings = {}
+
+MENU_FUNCTIONS = ["reg_user", "add_task", "view_all", "view_mine", "view_due",
+                  "display_stats", "login"]
+# Characters read at a time when looping over the lines of a file.
+READ_BLOCK_SIZE = 1 << 16
+
+STORAGE_METHODS = ["load_users", "add_users", "sync", "add_task", "add_tasks", "complete_task",
+                   "reassign_task", "change_due_date", "close"]
+
+def record(name, seconds, num_bytes = 0):
+    '''
+    Add one call taking 'seconds' to the total for 'name'
+    '''
+    timing = timings.get(name)
+    if timing is None:
+        timing = timings[name] = [0, 0.0, 0]
+    timing[0] += 1
+    timing[1] += seconds
+    timing[2] += num_bytes
+
+@contextmanager
+def timed(name):
+    '''
+    Time everything inside 'with timed(name):'
+    '''
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, time.perf_counter() - start)
+
+def timed_function(function, name):
+    '''
+    Returns a version of 'function' that records how long each call takes
+    '''
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(name, time.perf_counter() - start)
+    return wrapper
+
+def instrument(owner, names, prefix):
+    '''
+    Replace each named function of a module or class with a timed version
+    '''
+    for name in names:
+        if name in vars(owner):
+            setattr(owner, name, timed_function(getattr(owner, name), prefix + name))
+
+### -------------------- TIMING FILES
+# A CountedFile is handed out instead of the real file object, and passes
+# everything on to it while timing reads and writes and counting the bytes.
+class CountedFile:
+    def __init__(self, file, path):
+        self.file = file
+        name = os.path.basename(str(path))
+        self.read_name = f"file read {name}"
+        self.write_name = f"file write {name}"
+
+    def read(self, *args):
+        start = time.perf_counter()
+        data = self.file.read(*args)
+        record(self.read_name, time.perf_counter() - start, count_bytes(data))
+        return data
+
+    def readline(self, *args):
+        start = time.perf_counter()
+        line = self.file.readline(*args)
+        record(self.read_name, time.perf_counter() - start, count_bytes(line))
+        return line
+
+    def __iter__(self):
+        # Lines are read a block at a time, so timing every line does not
+        # slow loading down.
+        while True:
+            start = time.perf_counter()
+            lines = self.file.readlines(READ_BLOCK_SIZE)
+            record(self.read_name, time.perf_counter() - start, count_bytes("".join(lines)))
+            if not lines:
+                return
+            yield from lines
+
+    def write(self, data):
+        start = time.perf_counter()
+        result = self.file.write(data)
+        record(self.write_name, time.perf_counter() - start, count_bytes(data))
+        return result
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return self.file.__exit__(*exc_info)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+def count_bytes(data):
+    return len(data.encode()) if isinstance(data, str) else len(data)
+
+def counted_open(path, *args, **kwargs):
+    '''
+    Used in place of open() in the task manager's modules while profiling
+    '''
+    start = time.perf_counter()
+    file = open(path, *args, **kwargs)
+    record(f"file open {os.path.basename(str(path))}", time.perf_counter() - start)
+    return CountedFile(file, path)
+
+### -------------------- SWITCHING PROFILING ON
+def requested(args):
+    '''
+    Check whether profiling was asked for on the command line or with an
+    environment variable
+    '''
+    return "--profile" in args or os.environ.get("TASK_MANAGER_PROFILE") == "1"
+
+def stats_path(args):
+    '''
+    Returns the file cProfile results should be saved to, or None
+    '''
+    for arg in args:
+        if arg.startswith("--profile-stats="):
+            return arg.split("=", 1)[1]
+    return os.environ.get("TASK_MANAGER_PROFILE_STATS")
+
+def start(args, menu_module = None):
+    '''
+    Switch profiling on if it was asked for. Returns True if it was.
+
+    Inputs:
+    args: list of command line arguments
+    menu_module: the module whose menu functions should be timed (e.g.
+                 task_manager)
+    '''
+    path = stats_path(args)
+    if not requested(args) and path is None:
+        return False
+
+    # Imported here so that importing this module does not import them all.
+    import task_core, task_journal, task_lazy, task_storage, task_bulk, report_cache, user_registry
+
+    for module in (task_core, task_journal, task_lazy, task_storage, task_bulk, report_cache, user_registry):
+        module.open = counted_open
+    task_journal.load_tasks = timed_function(task_journal.load_tasks, "load parse tasks.txt")
+    instrument(task_journal.TaskJournal, ["replay", "compact"], "journal ")
+    instrument(task_core, ["generate_reports"], "")
+    instrument(report_cache, ["generate_reports"], "")
+    for storage_class in (task_storage.TextStorage, task_storage.SQLiteStorage):
+        storage_class.__init__ = timed_function(storage_class.__init__, f"load {storage_class.__name__}")
+        instrument(storage_class, STORAGE_METHODS, "storage ")
+    if menu_module is not None:
+        instrument(menu_module, MENU_FUNCTIONS, "menu ")
+        instrument(menu_module, ["get_reports"], "")
+
+    if path is not None:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        atexit.register(save_stats, profiler, path)
+    atexit.register(print_summary)
+    return True
+
+def save_stats(profiler, path):
+    profiler.disable()
+    profiler.dump_stats(path)
+    print(f"cProfile results saved to {path} (view them with 'python -m pstats {path}').",
+          file=sys.stderr)
+
+def print_summary(out = None):
+    '''
+    Print the number of calls, total and average time and bytes for
+    everything that was timed, slowest first
+    '''
+    out = out or sys.stderr
+    print("\n----------------------------------- PROFILE", file=out)
+    print(f"{'':<40} {'calls':>8} {'total ms':>10} {'avg ms':>9} {'bytes':>12}", file=out)
+    for name, (calls, seconds, num_bytes) in sorted(timings.items(), key=lambda item: -item[1][1]):
+        print(f"{name:<40} {calls:>8} {seconds*1000:>10.2f} {seconds*1000/calls:>9.3f} "
+              f"{num_bytes if num_bytes else '':>12}", file=out)
+    print("-----------------------------------", file=out)
@@ -0,0 +1,293 @@
+### -------------------- PROGRAM EXPLANATION
+# Service mode: a single program that owns the tasks and serves requests from
+# many local clients at once over a Unix socket (or TCP on systems without
+# Unix sockets).
+# Because only the service changes the tasks, no change can be lost, and the
+# tasks only need to be read once. Requests that change tasks are queued and
+# written in groups (group commits): every change waiting in the queue is
+# made inside a single storage.batch(), so a busy service writes the journal
+# (or commits the SQLite transaction) once per group instead of once per
+# change. Each client gets its reply once its group has been written.
+#
+# Every request and reply is a single line of JSON:
+#   {"command": "add", "username": ..., "title": ..., "description": ...,
+#    "due_date": "18 Jun 2030"}               -> {"ok": true, "task_number": 12}
+#   {"command": "complete", "task_number": 12} -> {"ok": true}
+#   {"command": "list", ...filters...}         -> {"ok": true, "tasks": [...]}
+#   {"command": "report"}                      -> {"ok": true, "reports": {...}}
+# "list" takes the same filters as 'task_cli.py list': username, completed,
+# overdue, due_from, due_to, sort, page and page_size ('completed' is true or
+# false, and the page and page size are whole numbers of 1 or more).
+# Failed requests get {"ok": false, "error": "..."}.
+#
+# Usage: python task_service.py [--sqlite] [--lazy] [--address ADDRESS]
+# ADDRESS is 'HOST:PORT' for TCP or a path for a Unix socket (the default is
+# 'tasks.sock', or 127.0.0.1:8765 on Windows).
+
+
+# Importing required modules
+import argparse
+import asyncio
+import json
+import os
+import socket
+from datetime import datetime
+from itertools import islice
+from task_core import DATETIME_STRING_FORMAT, open_storage
+from task_bulk import COLUMNS, row_to_task, task_to_values
+from task_listing import DEFAULT_PAGE_SIZE, select_tasks, paginate
+from report_cache import get_reports
+from user_registry import UserRegistry
+
+DEFAULT_ADDRESS = "tasks.sock" if hasattr(socket, "AF_UNIX") else "127.0.0.1:8765"
+
+# Most changes written together in one group commit.
+MAX_BATCH_SIZE = 1000
+
+WRITE_COMMANDS = ("add", "complete")
+
+def parse_address(address):
+    '''
+    Returns (host, port) for a 'HOST:PORT' address, or None for a Unix
+    socket path
+    '''
+    host, _, port = address.rpartition(":")
+    if host and port.isdigit():
+        return host, int(port)
+    return None
+
+def positive_field(request, name, default):
+    '''
+    Returns a field of a request that must be a whole number of 1 or more,
+    e.g. a page number or size
+    '''
+    number = request.get(name, default)
+    # bool is a kind of int, but 'true' is not a page number.
+    if isinstance(number, bool) or not isinstance(number, int):
+        raise ValueError(f"{name} must be a whole number")
+    if number < 1:
+        raise ValueError(f"{name} must be at least 1, not {number}")
+    return number
+
+### -------------------- DEFINING SERVICE CLASS
+class TaskService:
+    def __init__(self, storage):
+        '''
+        Inputs:
+        storage: TextStorage or SQLiteStorage holding the tasks
+        '''
+        self.storage = storage
+        self.users = UserRegistry(storage)
+        self.server = None
+        self.writes = None
+        self.committer = None
+        # Counted so the load test can show how well changes are grouped.
+        self.num_writes = 0
+        self.num_commits = 0
+
+    async def start(self, address = DEFAULT_ADDRESS):
+        '''
+        Start listening for clients. Returns the address actually used (e.g.
+        with the real port number if port 0 was asked for).
+        '''
+        self.writes = asyncio.Queue()
+        self.committer = asyncio.create_task(self.commit_writes())
+        tcp_address = parse_address(address)
+        if tcp_address is None:
+            if os.path.exists(address):
+                # Left behind by a service that did not shut down cleanly.
+                os.remove(address)
+            self.server = await asyncio.start_unix_server(self.handle_client, address)
+            return address
+        self.server = await asyncio.start_server(self.handle_client, *tcp_address)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"{host}:{port}"
+
+    async def stop(self):
+        '''
+        Stop accepting clients and wait for every queued change to be written
+        '''
+        self.server.close()
+        await self.server.wait_closed()
+        await self.writes.join()
+        self.committer.cancel()
+
+    ### ---------- Talking to clients
+    async def handle_client(self, reader, writer):
+        '''
+        Answer each line sent by a client until it disconnects
+        '''
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    reply = await self.handle(json.loads(line))
+                except (ValueError, KeyError, TypeError, IndexError, OverflowError, OSError) as error:
+                    reply = {"ok": False, "error": str(error)}
+                writer.write((json.dumps(reply) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle(self, request):
+        '''
+        Returns the reply to a single request
+        '''
+        if not isinstance(request, dict):
+            raise ValueError("each request must be a JSON object")
+        command = request.get("command")
+        if command in WRITE_COMMANDS:
+            reply = asyncio.get_running_loop().create_future()
+            await self.writes.put((request, reply))
+            return await reply
+        if command == "list":
+            return self.list_tasks(request)
+        if command == "report":
+            reports, regenerated = get_reports(self.storage, self.users)
+            return {"ok": True, "reports": reports, "regenerated": regenerated}
+        raise ValueError(f"Unknown command '{command}'")
+
+    ### ---------- Reading tasks
+    def list_tasks(self, request):
+        '''
+        Returns one page of the tasks matching the filters in a request
+        '''
+        due_from = request.get("due_from")
+        due_to = request.get("due_to")
+        completed = request.get("completed")
+        if completed is not None and not isinstance(completed, bool):
+            raise ValueError("completed must be true or false")
+        page_size = positive_field(request, "page_size", DEFAULT_PAGE_SIZE)
+        page_number = positive_field(request, "page", 1)
+        tasks = select_tasks(self.storage, username=request.get("username"),
+                             completed=completed,
+                             overdue=bool(request.get("overdue")),
+                             due_from=datetime.strptime(due_from, DATETIME_STRING_FORMAT) if due_from else None,
+                             due_to=datetime.strptime(due_to, DATETIME_STRING_FORMAT) if due_to else None,
+                             sort_by=request.get("sort", "number"))
+        page = next(islice(paginate(tasks, page_size), page_number - 1, None), [])
+        return {"ok": True,
+                "tasks": [dict(zip(["task_number"] + COLUMNS, [position+1] + task_to_values(task)))
+                          for position, task in page]}
+
+    ### ---------- Changing tasks
+    def apply_write(self, request):
+        '''
+        Make the change asked for by an 'add' or 'complete' request.
+        Raises ValueError if the request is invalid.
+        '''
+        if request["command"] == "add":
+            self.storage.add_task(row_to_task(request, self.users))
+            return {"ok": True, "task_number": self.storage.task_count()}
+
+        task_number = int(request["task_number"])
+        if not 1 <= task_number <= self.storage.task_count():
+            raise ValueError(f"There is no task {task_number}.")
+        self.storage.complete_task(task_number - 1)
+        return {"ok": True}
+
+    async def commit_writes(self):
+        '''
+        Runs for as long as the service does, writing queued changes in groups
+        '''
+        while True:
+            batch = [await self.writes.get()]
+            # Let every client that is ready queue its change before writing.
+            await asyncio.sleep(0)
+            while len(batch) < MAX_BATCH_SIZE and not self.writes.empty():
+                batch.append(self.writes.get_nowait())
+
+            replies = []
+            try:
+                with self.storage.batch():
+                    for request, _ in batch:
+                        # A bad request only fails itself, not the rest of
+                        # the group.
+                        try:
+                            replies.append(self.apply_write(request))
+                        except Exception as error:
+                            replies.append({"ok": False, "error": str(error)})
+            except Exception as error:
+                # The group could not be written (or the storage could not be
+                # read first), so none of its changes were saved. The
+                # committer keeps running, or every later change would wait
+                # forever.
+                failed = {"ok": False, "error": f"Changes could not be saved: {error}"}
+                replies = [reply if not reply["ok"] else failed for reply in replies]
+                replies += [failed] * (len(batch) - len(replies))
+
+            # Clients only hear back once their change has been written.
+            self.num_writes += len(batch)
+            self.num_commits += 1
+            for (_, future), reply in zip(batch, replies):
+                if not future.done():
+                    future.set_result(reply)
+                self.writes.task_done()
+
+### -------------------- CLIENT
+# A TaskClient sends requests to a running service, e.g.
+#   client = await TaskClient.connect("tasks.sock")
+#   reply = await client.request("add", username="admin", title=..., ...)
+class TaskClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, address = DEFAULT_ADDRESS):
+        tcp_address = parse_address(address)
+        if tcp_address is None:
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*tcp_address)
+        return cls(reader, writer)
+
+    async def request(self, command, **fields):
+        '''
+        Send a request and return the reply as a dictionary
+        '''
+        self.writer.write((json.dumps(dict(fields, command=command)) + "\n").encode())
+        await self.writer.drain()
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("The service closed the connection")
+        return json.loads(line)
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+### -------------------- RUNNING THE SERVICE
+async def run(storage, address):
+    service = TaskService(storage)
+    address = await service.start(address)
+    print(f"Serving tasks on {address}. Press Ctrl+C to stop.")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.stop()
+        if parse_address(address) is None and os.path.exists(address):
+            os.remove(address)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description="Serve tasks to many local clients at once.")
+    parser.add_argument("--sqlite", action="store_true", help="use tasks.db instead of tasks.txt and user.txt")
+    parser.add_argument("--lazy", action="store_true", help="memory-map tasks.txt instead of reading it all")
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help=f"'HOST:PORT' or the path of a Unix socket (default {DEFAULT_ADDRESS})")
+    args = parser.parse_args(argv)
+
+    storage = open_storage(["--sqlite"] if args.sqlite else [], lazy=args.lazy)
+    try:
+        asyncio.run(run(storage, args.address))
+    except KeyboardInterrupt:
+        print("Service stopped.")
+    finally:
+        storage.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+### -------------------- PROGRAM EXPLANATION
+# This module keeps running totals of the tasks in the system, both for each
+# user and for the system as a whole:
+# - Number of tasks.
+# - Number of completed tasks.
+# - Number of incomplete tasks.
+# - Number of overdue tasks.
+# The totals are worked out in a single pass over the tasks when the program
+# starts and are then updated whenever a task is added or edited, so reports
+# can be written without looking at every task again.
+
+
+# Importing required modules
+from datetime import date
+from task_table import scan_tasks
+
+### -------------------- DEFINING STATISTICS CLASS
+# Counters for each user are stored in a list: [tasks, completed, overdue].
+# The number of incomplete tasks is always tasks - completed.
+# A task due today counts as overdue once the day has started, the same as
+# comparing the due date with datetime.today().
+TASKS = 0
+COMPLETED = 1
+OVERDUE = 2
+
+class TaskStats:
+    def __init__(self, task_list = None, today = None, lazy = False):
+        '''
+        Inputs:
+        task_list: List of Task objects to count
+        today: Date used to decide whether a task is overdue
+        lazy: If True, the tasks are only counted the first time the counters
+              are needed
+        '''
+        self.task_list = [] if task_list is None else task_list
+        self.built = False
+        if not lazy:
+            self.rebuild(self.task_list, today)
+
+    def build_if_needed(self):
+        if not self.built:
+            self.rebuild(self.task_list)
+
+    def rebuild(self, task_list, today = None):
+        '''
+        Count every task from scratch in a single pass
+        '''
+        self.task_list = task_list
+        self.built = True
+        self.today = today or date.today()
+        self.totals = [0, 0, 0]
+        self.users = {}
+        for _, username, completed, due_day in scan_tasks(task_list):
+            self._update(username, completed, due_day, 1)
+
+    def refresh(self, task_list, task_index = None):
+        '''
+        Overdue counts depend on today's date, so they are recounted when the
+        date has changed since the counters were last built.
+        If a TaskIndex is given, only the overdue tasks it returns are looked
+        at instead of every task.
+        '''
+        if not self.built:
+            self.rebuild(task_list)
+            return
+        today = date.today()
+        if today == self.today:
+            return
+        if task_index is None:
+            self.rebuild(task_list, today)
+            return
+
+        self.today = today
+        self.totals[OVERDUE] = 0
+        for user_counts in self.users.values():
+            user_counts[OVERDUE] = 0
+        for position in task_index.overdue(today):
+            self.totals[OVERDUE] += 1
+            self.users[task_list[position].username][OVERDUE] += 1
+
+    def _update(self, username, completed, due_day, step):
+        '''
+        Add (step = 1) or remove (step = -1) a single task from the counters
+        '''
+        user_counts = self.users.get(username)
+        if user_counts is None:
+            user_counts = self.users[username] = [0, 0, 0]
+
+        overdue = not completed and due_day <= self.today.toordinal()
+        for counts in (self.totals, user_counts):
+            counts[TASKS] += step
+            if completed:
+                counts[COMPLETED] += step
+            elif overdue:
+                counts[OVERDUE] += step
+
+    def add(self, task):
+        # Counters that have not been built yet will count the task when they are.
+        if not self.built:
+            return
+        self._update(task.username, task.completed, task.due_date.toordinal(), 1)
+
+    def remove(self, task):
+        '''
+        Remove a task from the counters.
+        Call this before changing a task and add() afterwards.
+        '''
+        if not self.built:
+            return
+        self._update(task.username, task.completed, task.due_date.toordinal(), -1)
+
+    def user_counts(self, username):
+        '''
+        Returns (tasks, completed, incomplete, overdue) for a single user
+        '''
+        self.build_if_needed()
+        tasks, completed, overdue = self.users.get(username, (0, 0, 0))
+        return tasks, completed, tasks - completed, overdue
+
+    def total_counts(self):
+        '''
+        Returns (tasks, completed, incomplete, overdue) for the whole system
+        '''
+        self.build_if_needed()
+        tasks, completed, overdue = self.totals
+        return tasks, completed, tasks - completed, overdue
@@ -0,0 +1,560 @@
+### -------------------- PROGRAM EXPLANATION
+# This module defines the places tasks and users can be stored (backends).
+# Both backends offer the same methods, so task_manager.py does not need to
+# know which one it is using:
+# - TextStorage keeps using tasks.txt and user.txt, together with the journal,
+#   counters and indexes from task_journal.py, task_stats.py and task_index.py.
+# - SQLiteStorage keeps everything in a single SQLite database (tasks.db) with
+#   indexes on username, due date and completion, so lookups and reports are
+#   SQL queries and every change is a single-row transaction.
+#
+# Task positions start from 0 (task number - 1) in both backends.
+# Several copies of the program can use the same files at once: TextStorage
+# takes a lock (file_lock.py) and catches up with other copies' changes
+# before each change, and SQLite does the same thing itself. batch() groups
+# several changes into a single write.
+# Use migrate_to_sqlite.py to copy existing text files into a database.
+
+
+# Importing required modules
+import os
+import sqlite3
+from datetime import date, datetime, timedelta
+from task_table import Task, TaskTable
+from contextlib import contextmanager
+from task_journal import TaskJournal, ADD, RECORD_FIELDS, parse_record
+from task_lazy import LazyTaskFile
+from task_stats import TaskStats
+from task_index import TaskIndex
+from file_lock import FileLock
+
+DEFAULT_USERS = {"admin": "password"}
+
+### -------------------- TEXT FILE BACKEND
+class TextStorage:
+    def __init__(self, tasks_path = "tasks.txt", users_path = "user.txt", lazy = False):
+        '''
+        Inputs:
+        tasks_path: String - path to tasks.txt
+        users_path: String - path to user.txt
+        lazy: Boolean - memory-map tasks.txt instead of reading it all (see
+              task_lazy.py)
+        '''
+        self.tasks_path = tasks_path
+        self.users_path = users_path
+        self.lazy = lazy
+
+        # Changes made since tasks.txt was last written are kept in the
+        # journal, e.g. 'tasks.journal' next to 'tasks.txt'.
+        journal_path = os.path.splitext(tasks_path)[0] + ".journal"
+        self.journal = TaskJournal(tasks_path, journal_path)
+
+        # Every change is made while holding this lock, after catching up
+        # with any changes other programs have made (see sync()), so copies
+        # of the program running at the same time do not lose each other's
+        # changes.
+        self.lock = FileLock(tasks_path + ".lock")
+        self.task_list = None
+        with self.lock:
+            self._load()
+
+    def _load(self):
+        '''
+        Read every task, and work out the counters and indexes
+        '''
+        if self.lazy:
+            if self.task_list is not None:
+                self.task_list.close_snapshot()
+            self.task_list = self.journal.replay(LazyTaskFile(self.tasks_path))
+        else:
+            self.task_list = self.journal.load(TaskTable())
+
+        # In lazy mode the counters and indexes are only worked out the first
+        # time they are needed.
+        self.task_stats = TaskStats(self.task_list, lazy=self.lazy)
+        self.task_index = TaskIndex(self.task_list, lazy=self.lazy)
+
+    def sync(self):
+        '''
+        Catch up with changes other programs have made since the tasks were
+        read. Only the new journal records are applied, unless another
+        program has rewritten tasks.txt, in which case it is read again.
+        '''
+        if self.journal.pending is not None:
+            # Inside a batch the lock has been held since the batch started,
+            # so nothing can have changed.
+            return
+        with self.lock:
+            records = self.journal.new_records()
+            if records is None:
+                self._load()
+                return
+            for record in records:
+                try:
+                    name, position, value = parse_record(record)
+                    if name != ADD and position >= len(self.task_list):
+                        raise IndexError("task position out of range")
+                except (ValueError, IndexError):
+                    # Skipped the same way TaskJournal.replay() skips it, so
+                    # one bad record cannot stop the program.
+                    print(f"Skipping unreadable journal record: {record}")
+                    self.journal.num_records -= 1
+                    continue
+                if name == ADD:
+                    if position >= len(self.task_list):
+                        self.task_list.append_fields(*value)
+                        task = self.task_list[position]
+                        self.task_stats.add(task)
+                        self.task_index.add(position, task)
+                else:
+                    self._update_task(position, RECORD_FIELDS[name], value)
+
+    @contextmanager
+    def batch(self):
+        '''
+        Make several changes as one group: the lock is taken once and the
+        journal records are appended with a single write at the end
+        '''
+        with self.lock:
+            self.sync()
+            with self.journal.batch():
+                yield
+            self.save_changes()
+
+    ### ---------- Users
+    def load_users(self):
+        '''
+        Returns a dictionary of username-password pairs from user.txt.
+        If there is no user.txt, one is written with a default account.
+        '''
+        if not os.path.exists(self.users_path):
+            self.save_users(DEFAULT_USERS)
+
+        username_password = {}
+        with open(self.users_path, "r") as user_file:
+            for user in user_file.read().split("\n"):
+                if user == "":
+                    continue
+                username, password = user.split(";")
+                username_password[username] = password
+        return username_password
+
+    def save_users(self, username_dict):
+        '''
+        Write every username and password to user.txt
+        '''
+        with open(self.users_path, "w") as out_file:
+            user_data = []
+            for k in username_dict:
+                user_data.append(f"{k};{username_dict[k]}")
+            out_file.write("\n".join(user_data))
+
+    def add_user(self, username, password):
+        self.add_users({username: password})
+
+    def add_users(self, new_users):
+        '''
+        Store new users by adding them to the end of user.txt, instead of
+        writing every user again.
+
+        Inputs:
+        new_users: dictionary of username-password pairs to add
+        '''
+        if not new_users:
+            return
+        user_data = "\n".join([f"{k};{new_users[k]}" for k in new_users])
+        with self.lock:
+            if not os.path.exists(self.users_path):
+                self.save_users(DEFAULT_USERS)
+            with open(self.users_path, "rb+") as out_file:
+                # user.txt has no newline after the last user, so one is
+                # needed before the new users unless the file is empty.
+                out_file.seek(0, os.SEEK_END)
+                if out_file.tell() > 0:
+                    out_file.seek(-1, os.SEEK_END)
+                    if out_file.read(1) != b"\n":
+                        user_data = "\n" + user_data
+                out_file.write(user_data.encode())
+
+    ### ---------- Reading tasks
+    def data_version(self):
+        '''
+        Returns a string that changes whenever a task or user changes.
+        Every change appends to the journal or rewrites a file, so the sizes
+        and modification times of the files are enough to tell.
+        '''
+        parts = []
+        for path in (self.journal.snapshot_path, self.journal.journal_path, self.users_path):
+            if os.path.exists(path):
+                file_stat = os.stat(path)
+                parts.append(f"{file_stat.st_size}:{file_stat.st_mtime_ns}")
+            else:
+                parts.append("-")
+        return "text:" + ",".join(parts)
+
+    def task_count(self):
+        return len(self.task_list)
+
+    def get_task(self, position):
+        return self.task_list[position]
+
+    def iter_tasks(self):
+        '''
+        Yields (position, task) for every task
+        '''
+        return enumerate(self.task_list)
+
+    def tasks_for(self, username):
+        return self.task_index.tasks_for(username)
+
+    def overdue(self):
+        return self.task_index.overdue()
+
+    def due_within(self, days):
+        return self.task_index.due_within(days)
+
+    def total_counts(self):
+        '''
+        Returns (tasks, completed, incomplete, overdue) for the whole system
+        '''
+        self.task_stats.refresh(self.task_list, self.task_index)
+        return self.task_stats.total_counts()
+
+    def user_counts(self, username):
+        '''
+        Returns (tasks, completed, incomplete, overdue) for a single user
+        '''
+        self.task_stats.refresh(self.task_list, self.task_index)
+        return self.task_stats.user_counts(username)
+
+    ### ---------- Changing tasks
+    # Each change holds the lock and catches up with other programs first
+    # (see sync()), so task numbers always follow on from the newest task.
+    def save_changes(self):
+        '''
+        Compact the journal into tasks.txt once it has grown large enough.
+        Inside a batch this waits until the batch has been written.
+        By now every change is safely in the journal, so if compacting fails
+        (e.g. the disk is full) the journal is simply kept for next time
+        rather than reporting the changes as lost.
+        '''
+        if self.journal.pending is None and self.journal.needs_compaction(len(self.task_list)):
+            try:
+                self.journal.compact(self.task_list)
+            except OSError as error:
+                print(f"Could not fold the journal into {self.tasks_path}: {error}")
+
+    def add_task(self, task):
+        '''
+        Add a new task and record it in the journal
+        '''
+        with self.lock:
+            self.sync()
+            self.task_list.append(task)
+            self.task_stats.add(task)
+            self.task_index.add(len(self.task_list)-1, task)
+            self.journal.record_add(len(self.task_list), task)
+            self.save_changes()
+
+    def add_tasks(self, tasks):
+        '''
+        Add a list of new tasks, recording them in the journal with a single
+        write
+        '''
+        with self.lock:
+            self.sync()
+            first_task_num = len(self.task_list) + 1
+            for task in tasks:
+                self.task_list.append(task)
+                self.task_stats.add(task)
+                self.task_index.add(len(self.task_list)-1, task)
+            self.journal.record_adds(first_task_num, tasks)
+            self.save_changes()
+
+    def _update_task(self, position, field, value):
+        '''
+        Change one field of a task, keeping the counters and indexes up to date
+        '''
+        task = self.task_list[position]
+        self.task_stats.remove(task)
+        self.task_index.remove(position, task)
+        setattr(task, field, value)
+        self.task_stats.add(task)
+        self.task_index.add(position, task)
+
+    def complete_task(self, position):
+        with self.lock:
+            self.sync()
+            self._update_task(position, "completed", True)
+            self.journal.record_complete(position+1)
+            self.save_changes()
+
+    def reassign_task(self, position, username):
+        with self.lock:
+            self.sync()
+            self._update_task(position, "username", username)
+            self.journal.record_reassign(position+1, username)
+            self.save_changes()
+
+    def change_due_date(self, position, due_date):
+        with self.lock:
+            self.sync()
+            self._update_task(position, "due_date", due_date)
+            self.journal.record_redate(position+1, due_date)
+            self.save_changes()
+
+    def close(self):
+        '''
+        Fold any outstanding changes back into tasks.txt.
+        In lazy mode the journal is kept for next time instead, as rewriting
+        tasks.txt would also mean rebuilding its line index.
+        Nothing is rewritten if the journal is empty: rewriting tasks.txt
+        would take as long as reading it, change its modification time (so
+        the line index and saved reports would look out of date) and drop
+        any lines that could not be read.
+        '''
+        if not self.lazy:
+            with self.lock:
+                self.sync()
+                if self.journal.num_records > 0:
+                    self.journal.compact(self.task_list)
+
+### -------------------- SQLITE BACKEND
+# Dates are stored as date ordinals (whole numbers of days) and completion as
+# 0 or 1. The id of each task is its task number.
+# 'meta.generation' goes up by one whenever a task or user is added or
+# changed, so other code can tell whether anything has changed.
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY,
+    username TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    due_day INTEGER NOT NULL,
+    assigned_day INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS tasks_by_user ON tasks (username, completed, due_day);
+CREATE INDEX IF NOT EXISTS tasks_by_due_date ON tasks (completed, due_day);
+CREATE TABLE IF NOT EXISTS users (
+    username TEXT PRIMARY KEY,
+    password TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    generation INTEGER NOT NULL
+);
+INSERT INTO meta SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM meta);
+CREATE TRIGGER IF NOT EXISTS tasks_inserted AFTER INSERT ON tasks
+    BEGIN UPDATE meta SET generation = generation + 1; END;
+CREATE TRIGGER IF NOT EXISTS tasks_updated AFTER UPDATE ON tasks
+    BEGIN UPDATE meta SET generation = generation + 1; END;
+CREATE TRIGGER IF NOT EXISTS users_inserted AFTER INSERT ON users
+    BEGIN UPDATE meta SET generation = generation + 1; END;
+CREATE TRIGGER IF NOT EXISTS users_deleted AFTER DELETE ON users
+    BEGIN UPDATE meta SET generation = generation + 1; END;
+'''
+
+TASK_COLUMNS = "username, title, description, due_day, assigned_day, completed"
+
+def row_to_task(row):
+    '''
+    Convert a row of the tasks table into a Task
+    '''
+    username, title, description, due_day, assigned_day, completed = row
+    return Task(username, title, description, datetime.fromordinal(due_day),
+                datetime.fromordinal(assigned_day), completed == 1)
+
+def task_to_row(task):
+    '''
+    Convert a Task into the values for the tasks table
+    '''
+    return (task.username, task.title, task.description, task.due_date.toordinal(),
+            task.assigned_date.toordinal(), 1 if task.completed else 0)
+
+class SQLiteStorage:
+    def __init__(self, db_path = "tasks.db"):
+        '''
+        Inputs:
+        db_path: String - path to the SQLite database
+        '''
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(SCHEMA)
+        self.in_batch = False
+
+    ### ---------- Users
+    def load_users(self):
+        '''
+        Returns a dictionary of username-password pairs.
+        If there are no users, a default account is added.
+        '''
+        username_password = dict(self.connection.execute("SELECT username, password FROM users"))
+        if not username_password:
+            with self.connection:
+                self.connection.executemany("INSERT INTO users VALUES (?, ?)", DEFAULT_USERS.items())
+            username_password = dict(DEFAULT_USERS)
+        return username_password
+
+    def add_user(self, username, password):
+        self.add_users({username: password})
+
+    def add_users(self, new_users):
+        '''
+        Store new users. Raises ValueError, storing none of them, if any of
+        them already exists (e.g. another program has just registered the
+        same username), so no password is ever overwritten.
+        '''
+        try:
+            with self.transaction():
+                self.connection.executemany("INSERT INTO users VALUES (?, ?)", new_users.items())
+        except sqlite3.IntegrityError:
+            existing = [username for username in new_users
+                        if self.connection.execute("SELECT 1 FROM users WHERE username = ?",
+                                                   (username,)).fetchone()]
+            if len(existing) == 1:
+                raise ValueError(f"user '{existing[0]}' already exists")
+            raise ValueError(f"users {', '.join(existing) or 'being added'} already exist")
+
+    ### ---------- Reading tasks
+    def data_version(self):
+        '''
+        Returns a string that changes whenever a task or user changes
+        '''
+        generation = self.connection.execute("SELECT generation FROM meta").fetchone()[0]
+        return f"sqlite:{generation}"
+
+    def task_count(self):
+        return self.connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0]
+
+    def get_task(self, position):
+        row = self.connection.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?",
+                                      (position+1,)).fetchone()
+        if row is None:
+            raise IndexError("task position out of range")
+        return row_to_task(row)
+
+    def iter_tasks(self):
+        '''
+        Yields (position, task) for every task
+        '''
+        for row in self.connection.execute(f"SELECT id, {TASK_COLUMNS} FROM tasks ORDER BY id"):
+            yield row[0]-1, row_to_task(row[1:])
+
+    def _positions(self, query, parameters):
+        return [row[0]-1 for row in self.connection.execute(query, parameters)]
+
+    def tasks_for(self, username):
+        return self._positions("SELECT id FROM tasks WHERE username = ? ORDER BY id", (username,))
+
+    def overdue(self):
+        '''
+        Incomplete tasks due today or earlier, in due date order (as in the
+        reports, a task due today counts as overdue)
+        '''
+        return self._positions("SELECT id FROM tasks WHERE completed = 0 AND due_day <= ? "
+                               "ORDER BY due_day, id", (date.today().toordinal(),))
+
+    def due_within(self, days):
+        today = date.today()
+        return self._positions("SELECT id FROM tasks WHERE completed = 0 AND due_day BETWEEN ? AND ? "
+                               "ORDER BY due_day, id",
+                               ((today + timedelta(days=1)).toordinal(),
+                                (today + timedelta(days=days)).toordinal()))
+
+    def _counts(self, where, parameters):
+        '''
+        Returns (tasks, completed, incomplete, overdue) for the matching tasks
+        '''
+        tasks, completed, overdue = self.connection.execute(
+            "SELECT COUNT(*), TOTAL(completed), TOTAL(completed = 0 AND due_day <= ?) "
+            f"FROM tasks {where}", (date.today().toordinal(),) + parameters).fetchone()
+        tasks, completed, overdue = int(tasks), int(completed), int(overdue)
+        return tasks, completed, tasks - completed, overdue
+
+    def total_counts(self):
+        return self._counts("", ())
+
+    def user_counts(self, username):
+        return self._counts("WHERE username = ?", (username,))
+
+    ### ---------- Changing tasks
+    # 'with self.transaction()' wraps each change in its own transaction,
+    # unless it is part of a batch. SQLite itself stops other programs from
+    # changing the database at the same time, so nothing needs to be synced.
+    def sync(self):
+        pass
+
+    @contextmanager
+    def transaction(self):
+        if self.in_batch:
+            yield
+        else:
+            with self.connection:
+                yield
+
+    @contextmanager
+    def batch(self):
+        '''
+        Make several changes in a single transaction (a group commit)
+        '''
+        if self.in_batch:
+            yield
+            return
+        self.in_batch = True
+        try:
+            with self.connection:
+                yield
+        finally:
+            self.in_batch = False
+
+    def add_task(self, task):
+        with self.transaction():
+            self.connection.execute(f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                                    task_to_row(task))
+
+    def add_tasks(self, tasks):
+        '''
+        Add a list of new tasks in a single transaction
+        '''
+        with self.transaction():
+            self.connection.executemany(f"INSERT INTO tasks ({TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)",
+                                        (task_to_row(task) for task in tasks))
+
+    def complete_task(self, position):
+        with self.transaction():
+            self.connection.execute("UPDATE tasks SET completed = 1 WHERE id = ?", (position+1,))
+
+    def reassign_task(self, position, username):
+        with self.transaction():
+            self.connection.execute("UPDATE tasks SET username = ? WHERE id = ?", (username, position+1))
+
+    def change_due_date(self, position, due_date):
+        with self.transaction():
+            self.connection.execute("UPDATE tasks SET due_day = ? WHERE id = ?",
+                                    (due_date.toordinal(), position+1))
+
+    def close(self):
+        self.connection.close()
+
+### -------------------- MIGRATION
+def import_text_files(text_storage, db_path):
+    '''
+    Copy every task and user from a TextStorage into a new SQLite database in
+    a single transaction.
+
+    Returns the number of tasks and users copied.
+    '''
+    sqlite_storage = SQLiteStorage(db_path)
+    connection = sqlite_storage.connection
+    if connection.execute("SELECT COUNT(*) FROM tasks").fetchone()[0] > 0:
+        sqlite_storage.close()
+        raise ValueError(f"{db_path} already contains tasks")
+
+    username_password = text_storage.load_users()
+    with connection:
+        connection.execute("DELETE FROM users")
+        connection.executemany("INSERT INTO users VALUES (?, ?)", username_password.items())
+        connection.executemany(f"INSERT INTO tasks (id, {TASK_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                               ((position+1,) + task_to_row(task) for position, task in text_storage.iter_tasks()))
+    num_tasks = sqlite_storage.task_count()
+    sqlite_storage.close()
+    return num_tasks, len(username_password)
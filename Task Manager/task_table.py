@@ -0,0 +1,226 @@
+### -------------------- PROGRAM EXPLANATION
+# This module defines the Task class and a compact table for storing a large
+# number of tasks.
+# Keeping a separate Task object for every line of tasks.txt uses a lot of
+# memory once there are hundreds of thousands of tasks, so the TaskTable stores
+# each field of every task in its own column instead:
+# - Usernames are stored once and each task keeps a small number for its user.
+# - Dates are stored as whole numbers of days (date ordinals).
+# - Completion is stored as a single byte.
+# Looking up a task in the table returns a TaskView, which behaves like a Task
+# (display(), to_string(), reading and changing fields) but reads and writes
+# the table's columns directly.
+
+
+# Importing required modules
+from array import array
+from datetime import datetime
+
+DATETIME_STRING_FORMAT = "%d %b %Y" # Changed from %Y-%m-%d to %d %b %Y to
+                                    # overcome error in original code.
+
+### -------------------- DEFINING TASK CLASS
+# The following code defines a Class for the tasks.
+# This contains methods that convert the task from a string to an object,
+# convert tasks from an object to a string, and methods that display the task
+# in a readable format to the user.
+# '__slots__' stops each Task from carrying its own attribute dictionary.
+class Task:
+    __slots__ = ("username", "title", "description", "due_date", "assigned_date", "completed")
+
+    def __init__(self, username = None, title = None, description = None, due_date = None, assigned_date = None, completed = None):
+        '''
+        Inputs:
+        username: String
+        title: String
+        description: String
+        due_date: DateTime
+        assigned_date: DateTime
+        completed: Boolean
+        '''
+        self.username = username
+        self.title = title
+        self.description = description
+        self.due_date = due_date
+        self.assigned_date = assigned_date
+        self.completed = completed
+
+    def from_string(self, task_str):
+        '''
+        Convert from string in tasks.txt to object
+        '''
+        tasks = task_str.split(", ") # Changed ";" to ", " to overcome error in
+        self.username = tasks[0]     # original code.
+        self.title = tasks[1]
+        self.description = tasks[2]
+        self.due_date = datetime.strptime(tasks[3], DATETIME_STRING_FORMAT)     # Same order as
+        self.assigned_date = datetime.strptime(tasks[4], DATETIME_STRING_FORMAT) # to_string().
+        self.completed = True if tasks[5] == "Yes" else False
+
+
+    def to_string(self):
+        '''
+        Convert to string for storage in tasks.txt
+        '''
+        str_attrs = [
+            self.username,
+            self.title,
+            self.description,
+            self.due_date.strftime(DATETIME_STRING_FORMAT),
+            self.assigned_date.strftime(DATETIME_STRING_FORMAT),
+            "Yes" if self.completed else "No"
+        ]
+        return ", ".join(str_attrs)
+
+    def display(self,task_num):
+        '''
+        Display object in readable format
+        '''
+        # Built with a single f-string rather than repeated '+=', as this is
+        # called for every task that is listed.
+        return (f"Task {task_num}: \t\t {self.title}\n"
+                f"Assigned to: \t {self.username}\n"
+                f"Date Assigned: \t {self.assigned_date.strftime(DATETIME_STRING_FORMAT)}\n"
+                f"Due Date: \t {self.due_date.strftime(DATETIME_STRING_FORMAT)}\n"
+                f"Task Description: \n {self.description}\n"
+                f"Task Completion Status: \n {self.completed}\n")
+
+### -------------------- DEFINING TASK VIEW CLASS
+# A TaskView is a lightweight stand-in for a Task stored in a TaskTable. It
+# only holds the table and the position of the task, and uses the same
+# to_string() and display() code as Task.
+class TaskView:
+    __slots__ = ("table", "position")
+
+    def __init__(self, table, position):
+        self.table = table
+        self.position = position
+
+    @property
+    def username(self):
+        return self.table.usernames[self.table.user_ids[self.position]]
+
+    @username.setter
+    def username(self, value):
+        self.table.user_ids[self.position] = self.table.user_id(value)
+
+    @property
+    def title(self):
+        return self.table.titles[self.position]
+
+    @title.setter
+    def title(self, value):
+        self.table.titles[self.position] = value
+
+    @property
+    def description(self):
+        return self.table.descriptions[self.position]
+
+    @description.setter
+    def description(self, value):
+        self.table.descriptions[self.position] = value
+
+    @property
+    def due_date(self):
+        return datetime.fromordinal(self.table.due_days[self.position])
+
+    @due_date.setter
+    def due_date(self, value):
+        self.table.due_days[self.position] = value.toordinal()
+
+    @property
+    def assigned_date(self):
+        return datetime.fromordinal(self.table.assigned_days[self.position])
+
+    @assigned_date.setter
+    def assigned_date(self, value):
+        self.table.assigned_days[self.position] = value.toordinal()
+
+    @property
+    def completed(self):
+        return self.table.completed[self.position] == 1
+
+    @completed.setter
+    def completed(self, value):
+        self.table.completed[self.position] = 1 if value else 0
+
+    to_string = Task.to_string
+    display = Task.display
+
+### -------------------- DEFINING TASK TABLE CLASS
+# The table can be used in the same way as a list of tasks: len(), indexing,
+# looping and append() all work, with indexing and looping returning TaskViews.
+class TaskTable:
+    def __init__(self):
+        self.usernames = []      # user id -> username
+        self.user_lookup = {}    # username -> user id
+        self.user_ids = array("I")
+        self.titles = []
+        self.descriptions = []
+        self.due_days = array("i")
+        self.assigned_days = array("i")
+        self.completed = bytearray()
+
+    def user_id(self, username):
+        '''
+        Returns the number used to store a username, adding it if it is new
+        '''
+        user_id = self.user_lookup.get(username)
+        if user_id is None:
+            user_id = self.user_lookup[username] = len(self.usernames)
+            self.usernames.append(username)
+        return user_id
+
+    def __len__(self):
+        return len(self.completed)
+
+    def __getitem__(self, position):
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("task position out of range")
+        return TaskView(self, position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield TaskView(self, position)
+
+    def append_fields(self, username, title, description, due_day, assigned_day, completed):
+        '''
+        Add a task from its fields, with the dates given as date ordinals
+        '''
+        self.user_ids.append(self.user_id(username))
+        self.titles.append(title)
+        self.descriptions.append(description)
+        self.due_days.append(due_day)
+        self.assigned_days.append(assigned_day)
+        self.completed.append(1 if completed else 0)
+
+    def append(self, task):
+        '''
+        Add a Task (or anything with the same fields) to the table
+        '''
+        self.append_fields(task.username, task.title, task.description,
+                           task.due_date.toordinal(), task.assigned_date.toordinal(),
+                           task.completed)
+
+    def scan(self):
+        '''
+        Yields (position, username, completed, due date ordinal) for every
+        task straight from the columns, without creating any TaskViews.
+        Used when counting or indexing every task at once.
+        '''
+        usernames = self.usernames
+        for position, (user_id, completed, due_day) in enumerate(zip(self.user_ids, self.completed, self.due_days)):
+            yield position, usernames[user_id], completed == 1, due_day
+
+def scan_tasks(task_list):
+    '''
+    Yields (position, username, completed, due date ordinal) for every task in
+    a TaskTable, LazyTaskFile or plain list of tasks
+    '''
+    if hasattr(task_list, "scan"):
+        yield from task_list.scan()
+        return
+    for position, task in enumerate(task_list):
+        yield position, task.username, bool(task.completed), task.due_date.toordinal()
@@ -0,0 +1,148 @@
+### -------------------- PROGRAM EXPLANATION
+# This module keeps track of the registered users.
+# A UserRegistry holds every username and password in a dictionary, so
+# checking whether a username is taken is a single exact lookup ("user" does
+# not match "user1"). New users are added to the end of user.txt (or inserted
+# into tasks.db) instead of the whole file being written again.
+# Many users can be registered at once with register_many() or import_users(),
+# which check every user first and then store them all with a single write.
+# import_users() reads CSV or JSON Lines files with the columns username and
+# password (see task_bulk.py).
+
+
+# Importing required modules
+from collections.abc import Mapping
+from task_core import is_safe_string
+from task_bulk import file_format, read_rows, read_batches
+
+### -------------------- DEFINING USER REGISTRY CLASS
+# A UserRegistry can be used like the 'username_password' dictionary it
+# replaces (e.g. 'username in registry', 'registry[username]', len()), but
+# users can only be added through register() and register_many() so they are
+# always stored as well.
+class UserRegistry(Mapping):
+    def __init__(self, storage):
+        '''
+        Inputs:
+        storage: TextStorage or SQLiteStorage holding the users
+        '''
+        self.storage = storage
+        self.users = storage.load_users()
+
+    def __getitem__(self, username):
+        return self.users[username]
+
+    def __iter__(self):
+        return iter(self.users)
+
+    def __len__(self):
+        return len(self.users)
+
+    def __contains__(self, username):
+        return username in self.users
+
+    def check_new_user(self, username, password):
+        '''
+        Raises ValueError describing why a user cannot be registered
+        '''
+        if username == "":
+            raise ValueError("username cannot be empty")
+        if username in self.users:
+            raise ValueError(f"user '{username}' already exists")
+        # Users are stored one per line as 'username;password' in user.txt,
+        # and usernames are also stored in each task (fields separated by
+        # ', ') and journal record.
+        if not is_safe_string(username):
+            raise ValueError("username cannot contain ';', ', ' or a line break")
+        if ";" in password or "\n" in password or "\r" in password:
+            raise ValueError("password cannot contain ';' or a line break")
+
+    def register(self, username, password):
+        '''
+        Check and store a single new user.
+        Raises ValueError if the user cannot be registered.
+        '''
+        self.check_new_user(username, password)
+        self.storage.add_user(username, password)
+        self.users[username] = password
+
+    def check_many(self, new_users):
+        '''
+        Check many new users without storing them.
+
+        Inputs:
+        new_users: iterable of (username, password) pairs
+
+        Returns (dictionary of the valid users, list of (position, error
+        message)), counting positions from 1.
+        '''
+        valid_users = {}
+        errors = []
+        for position, (username, password) in enumerate(new_users, 1):
+            try:
+                self.check_new_user(username, password)
+                if username in valid_users:
+                    raise ValueError(f"user '{username}' is listed more than once")
+            except ValueError as error:
+                errors.append((position, str(error)))
+                continue
+            valid_users[username] = password
+        return valid_users, errors
+
+    def store_many(self, valid_users):
+        '''
+        Store users already checked by check_many() with a single write
+        '''
+        self.storage.add_users(valid_users)
+        self.users.update(valid_users)
+
+    def register_many(self, new_users, skip_invalid = False):
+        '''
+        Check and store many new users with a single write.
+
+        Inputs:
+        new_users: iterable of (username, password) pairs
+        skip_invalid: Boolean - store the valid users even if some are invalid
+
+        Returns (number of users registered, list of (position, error message)).
+        Unless 'skip_invalid' is True, nothing is stored if any user is invalid.
+        '''
+        valid_users, errors = self.check_many(new_users)
+        if errors and not skip_invalid:
+            return 0, errors
+        self.store_many(valid_users)
+        return len(valid_users), errors
+
+### -------------------- IMPORTING USERS
+def import_users(path, registry, skip_invalid = False):
+    '''
+    Register every user in a CSV or JSON Lines file.
+
+    Inputs:
+    path: String - path to the file
+    registry: UserRegistry to add the users to
+    skip_invalid: Boolean - register the valid users even if some are invalid
+
+    Returns (number of users registered, list of (line number, error message)).
+    Unless 'skip_invalid' is True, nothing is registered if any row is invalid.
+    '''
+    format = file_format(path)
+    line_numbers = []
+    new_users = []
+    errors = []
+    with open(path, "r", newline="") as in_file:
+        for batch in read_batches(read_rows(in_file, format)):
+            for line_number, row in batch:
+                if not isinstance(row, dict) or not row.get("username") or row.get("password") is None:
+                    errors.append((line_number, "username and password are required"))
+                    continue
+                line_numbers.append(line_number)
+                new_users.append((str(row["username"]), str(row["password"])))
+
+    valid_users, user_errors = registry.check_many(new_users)
+    errors += [(line_numbers[position-1], error) for position, error in user_errors]
+    errors.sort()
+    if errors and not skip_invalid:
+        return 0, errors
+    registry.store_many(valid_users)
+    return len(valid_users), errors